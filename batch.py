@@ -0,0 +1,103 @@
+import asyncio
+import json
+import statistics
+import time
+from config import BATCH_CONCURRENCY
+from helpers import flag_value, percentile
+
+
+def parse_batch_args(argv):
+    """Return (in_path, out_path, concurrency) from main.py's argv."""
+    in_path = flag_value(argv, "--batch")
+    out_path = flag_value(argv, "--out")
+    if out_path is None:
+        raise ValueError("--batch needs --out <file.jsonl>")
+    concurrency = flag_value(argv, "--concurrency")
+    try:
+        concurrency = BATCH_CONCURRENCY if concurrency is None else int(concurrency)
+    except ValueError:
+        raise ValueError("--concurrency must be an integer")
+    if concurrency < 1:
+        raise ValueError("--concurrency must be at least 1")
+    return in_path, out_path, concurrency
+
+
+def _read_prompts(in_path):
+    """Yield (id, prompt) for each JSONL line.
+
+    A line may carry "prompt" directly, or "title"/"body" like requests.jsonl.
+    """
+    with open(in_path, "r") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield lineno, None
+                continue
+            if isinstance(item, str):
+                item = {"prompt": item}
+            if not isinstance(item, dict):
+                yield lineno, None
+                continue
+            prompt = item.get("prompt")
+            if not prompt:
+                prompt = "\n\n".join(p for p in (item.get("title"), item.get("body")) if p)
+            yield item.get("id", item.get("request_id", lineno)), prompt or None
+
+
+async def run_batch(client, process, in_path, out_path, concurrency=BATCH_CONCURRENCY, verbose_flag=False):
+    """Run every prompt in in_path through process (process_prompt_async).
+
+    Up to `concurrency` prompts are in flight at once, each with its own
+    message history. A result line is written to out_path as soon as its
+    prompt finishes, so output order is completion order. Returns a summary.
+    """
+    prompts = _read_prompts(in_path)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+
+    with open(out_path, "w") as out:
+        async def worker():
+            nonlocal errors
+            # the shared generator hands each prompt to exactly one worker
+            for prompt_id, prompt in prompts:
+                t0 = time.perf_counter()
+                record = {"id": prompt_id, "prompt": prompt}
+                if prompt is None:
+                    record["error"] = "invalid input line"
+                else:
+                    try:
+                        record["response"] = await process(client, prompt, verbose_flag)
+                    except Exception as e:
+                        record["error"] = str(e)
+                elapsed = time.perf_counter() - t0
+                record["latency_s"] = round(elapsed, 3)
+                if "error" in record:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    wall = time.perf_counter() - started
+    total = len(latencies) + errors
+    lines = [
+        f"Batch: {total} prompts ({errors} failed) in {wall:.2f}s with concurrency {concurrency}",
+        f"Throughput: {total / wall if wall > 0 else 0.0:.2f} prompts/s",
+    ]
+    if latencies:
+        lines.append(
+            "Latency: mean {:.2f}s, p50 {:.2f}s, p95 {:.2f}s, max {:.2f}s".format(
+                statistics.fmean(latencies),
+                percentile(latencies, 50),
+                percentile(latencies, 95),
+                max(latencies),
+            )
+        )
+    return "\n".join(lines)
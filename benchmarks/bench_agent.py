@@ -0,0 +1,190 @@
+"""End-to-end agent-loop benchmarks against the scripted fake model.
+
+Measures the agent's own overhead per turn (the fake model answers instantly
+unless --model-latency is given): wall time, time spent inside call_function,
+and peak Python allocations. Each scenario runs in its own process and
+sandbox, so caches and memory files never leak between scenarios.
+
+    python3 benchmarks/bench_agent.py                  # run and print
+    python3 benchmarks/bench_agent.py --save-baseline  # write baselines.json
+    python3 benchmarks/bench_agent.py --check          # fail on regressions
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines.json")
+
+
+def _many_file_reads(sandbox):
+    for i in range(40):
+        with open(os.path.join(sandbox, "code-files", f"mod_{i}.py"), "w") as f:
+            f.write(f"# module {i}\n" + "x = 1\n" * 300)
+    steps = [
+        {"calls": [{"name": "read", "args": {"file_path": f"mod_{8 * s + i}.py"}} for i in range(8)]}
+        for s in range(3)
+    ]
+    return "look at these files", steps + [{"text": "They all set x."}]
+
+
+def _batched_file_reads(sandbox):
+    # the same 24 reads as many_file_reads, in two batch calls
+    prompt, _ = _many_file_reads(sandbox)
+    steps = [
+        {"calls": [{"name": "batch", "args": {"operations": [
+            {"op": "read", "path": f"mod_{12 * s + i}.py"} for i in range(12)
+        ]}}]}
+        for s in range(2)
+    ]
+    return prompt, steps + [{"text": "They all set x."}]
+
+
+def _edit_run_loop(sandbox):
+    steps = []
+    for i in range(5):
+        steps.append({"calls": [{"name": "write", "args": {"file_path": "app.py", "content": f"print({i} * 2)\n"}}]})
+        steps.append({"calls": [{"name": "run_python", "args": {"file_path": "app.py"}}]})
+    return "fix app.py until it works", steps + [{"text": "Fixed."}]
+
+
+def _large_memory(sandbox):
+    os.makedirs(os.path.join(sandbox, "db"), exist_ok=True)
+    with open(os.path.join(sandbox, "db", "memory.jsonl"), "w") as f:
+        for i in range(1, 50001):
+            f.write(json.dumps({"id": i, "user": f"question {i} about sorting and files", "assistant": f"answer {i}"}) + "\n")
+    steps = [
+        {"calls": [{"name": "search_memory", "args": {"query": q}}]}
+        for q in ("sorting bug", "files question 4242", "previous question")
+    ]
+    return "what did we discuss about sorting", steps + [{"text": "We discussed sorting."}]
+
+
+def _twenty_iterations(sandbox):
+    with open(os.path.join(sandbox, "code-files", "notes.txt"), "w") as f:
+        f.write("note\n" * 500)
+    steps = []
+    for i in range(19):
+        if i % 2:
+            steps.append({"calls": [{"name": "read", "args": {"file_path": "notes.txt", "start_line": i}}]})
+        else:
+            steps.append({"calls": [{"name": "get_files_info", "args": {}}]})
+    return "walk through everything", steps + [{"text": "Done after 20 iterations."}]
+
+
+SCENARIOS = {
+    "many_file_reads": _many_file_reads,
+    "batched_file_reads": _batched_file_reads,
+    "edit_run_loop": _edit_run_loop,
+    "large_memory": _large_memory,
+    "twenty_iterations": _twenty_iterations,
+}
+
+
+def _run_scenario(name, repeats, model_latency):
+    """Child-process side: run one scenario and print its metrics as JSON."""
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as sandbox:
+        os.makedirs(os.path.join(sandbox, "code-files"))
+        prompt, steps = SCENARIOS[name](sandbox)
+        os.chdir(sandbox)
+
+        import call_function
+        import main
+        from fake_client import FakeClient
+
+        tool_time = [0.0]
+        real_call_function = call_function.call_function
+
+        def timed_call_function(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return real_call_function(*args, **kwargs)
+            finally:
+                tool_time[0] += time.perf_counter() - t0
+
+        call_function.call_function = timed_call_function
+        client = FakeClient({"latency_s": model_latency, "turns": [{"steps": steps}]})
+
+        def turn():
+            tool_time[0] = 0.0
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                main.process_prompt(client, prompt)
+                return time.perf_counter() - t0, tool_time[0]
+
+        turn()  # warm-up: builds indexes and caches a real session would already have
+        walls, tools = zip(*(turn() for _ in range(repeats)))
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        turn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(json.dumps({
+        "wall_ms": statistics.median(walls) * 1000,
+        "tool_ms": statistics.median(tools) * 1000,
+        "peak_kb": peak / 1024,
+        "model_calls_per_turn": len(steps),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds per fake model call")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a metric regresses past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_scenario(args.child, args.repeats, args.model_latency)
+        return
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name,
+             "--repeats", str(args.repeats), "--model-latency", str(args.model_latency)],
+            capture_output=True, text=True, check=True,
+        )
+        results[name] = json.loads(out.stdout.strip().splitlines()[-1])
+        r = results[name]
+        print(f"{name:>18}: wall {r['wall_ms']:8.1f} ms  call_function {r['tool_ms']:8.1f} ms  "
+              f"peak alloc {r['peak_kb']:8.0f} KB  ({r['model_calls_per_turn']} model calls)")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {BASELINE_FILE}")
+
+    if args.check:
+        if not os.path.exists(BASELINE_FILE):
+            print("no baseline saved yet; run with --save-baseline first")
+            sys.exit(1)
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+        failed = False
+        for name, metrics in results.items():
+            for key in ("wall_ms", "tool_ms", "peak_kb"):
+                base = baseline.get(name, {}).get(key)
+                if base and metrics[key] > base * (1 + args.tolerance):
+                    print(f"REGRESSION {name}.{key}: {metrics[key]:.1f} vs baseline {base:.1f}")
+                    failed = True
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Semantic memory query latency over a large synthetic memory.
+
+Builds a sandbox db/ with N placeholder records and N random unit vectors
+(written straight into the .npy, so no embedding backfill is timed), then
+times memory_vectors.search end to end.
+
+    python3 benchmarks/bench_memory_vectors.py [N] [queries]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import session  # noqa: E402
+from functions import memory_store, memory_vectors  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    memory_vectors.MEMORY_SEMANTIC = True  # measured whatever config.py says
+    if not memory_vectors.available():
+        print("numpy is not installed; nothing to measure")
+        return
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as sandbox:
+        os.chdir(sandbox)
+        os.makedirs(session.memory_dir())
+        line = json.dumps({"id": 1, "user": "q", "assistant": "a"}) + "\n"
+        with open(memory_store.log_file(), "w") as f:
+            f.write(line * n)
+        memory_store.count()  # builds the offset index outside the timed part
+
+        rng = np.random.default_rng(0)
+        matrix = np.lib.format.open_memmap(
+            memory_vectors.vectors_file(), mode="w+", dtype="<f4", shape=(n, memory_vectors.EMBED_DIM)
+        )
+        for start in range(0, n, 65536):
+            block = rng.standard_normal((min(65536, n - start), memory_vectors.EMBED_DIM), dtype=np.float32)
+            matrix[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+        matrix.flush()
+        del matrix
+
+        memory_vectors.search("warm up the page cache", 5)
+        samples = []
+        for i in range(queries):
+            t0 = time.perf_counter()
+            memory_vectors.search(f"sorting bug number {i}", 5)
+            samples.append((time.perf_counter() - t0) * 1000)
+        os.chdir(ROOT)
+
+    print(f"{n} vectors x {memory_vectors.EMBED_DIM} dims: "
+          f"median {statistics.median(samples):.1f} ms, max {max(samples):.1f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare run_python's cold path (fresh python3 per call) with warm workers.
+
+    python3 benchmarks/bench_run_python.py [runs]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from functions import run_python as run_python_module  # noqa: E402
+from functions import warm_python  # noqa: E402
+
+SCRIPT = """\
+import collections, itertools, json, re, sys
+counts = collections.Counter(re.findall(r"\\w+", json.dumps(sys.argv)))
+print(sum(counts.values()))
+"""
+
+
+def _time_runs(sandbox, runs, warm):
+    run_python_module.RUN_PYTHON_WARM = warm
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = run_python_module.run_python(sandbox, "bench.py", ["a", "b"])
+        samples.append(time.perf_counter() - t0)
+        if not result.startswith("STDOUT:"):
+            raise RuntimeError(f"unexpected run_python output: {result!r}")
+    return samples
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    if not warm_python.available():
+        print("warm workers need os.fork and socket.send_fds; nothing to compare")
+        return
+    with tempfile.TemporaryDirectory() as sandbox:
+        with open(os.path.join(sandbox, "bench.py"), "w") as f:
+            f.write(SCRIPT)
+        cold = _time_runs(sandbox, runs, warm=False)
+        _time_runs(sandbox, 1, warm=True)  # start the pool outside the timing
+        warm = _time_runs(sandbox, runs, warm=True)
+    for name, samples in (("cold", cold), ("warm", warm)):
+        print(
+            f"{name}: mean {statistics.fmean(samples) * 1000:.1f} ms, "
+            f"p50 {statistics.median(samples) * 1000:.1f} ms, "
+            f"min {min(samples) * 1000:.1f} ms over {runs} runs"
+        )
+    print(f"speedup: {statistics.fmean(cold) / statistics.fmean(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Startup-time budget for main.py, measured with `python -X importtime`.
+
+Reports, as the median over several fresh interpreters:
+  - import main: the cumulative import time of main.py,
+  - agent-owned: that minus google.genai, which every mode needs,
+  - single-shot: wall time of a whole `main.py "<prompt>"` run against the
+    scripted fake model (no network), i.e. cold start to exit.
+It also fails if a module that only one mode needs (instructor, the
+structured-output models, batch mode, the tools) is loaded by `import main`.
+
+    python3 benchmarks/bench_startup.py           # print
+    python3 benchmarks/bench_startup.py --check   # exit 1 when over budget
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# loaded on first use by the modes that need them, never by `import main`
+LAZY_MODULES = ("instructor", "functions.structured", "batch", "fake_client", "dotenv", "call_function")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_profile():
+    """Return {top-level-or-nested module: cumulative us} for `import main`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in out.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            cumulative.setdefault(m.group(4), int(m.group(2)))
+    return cumulative
+
+
+def _single_shot(sandbox):
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), "say hi"],
+        cwd=sandbox, capture_output=True, check=True,
+        env={**os.environ, "CODEGEN_BACKEND": "fake:script.json"},
+    )
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="budget for the whole `import main`")
+    parser.add_argument("--own-budget-ms", type=float, default=30.0, help="budget for agent-owned imports")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a budget is exceeded")
+    args = parser.parse_args()
+
+    totals, owned, loaded = [], [], set()
+    for _ in range(args.runs):
+        profile = _import_profile()
+        totals.append(profile["main"] / 1000)
+        owned.append((profile["main"] - profile.get("google.genai", 0)) / 1000)
+        loaded.update(name for name in LAZY_MODULES if name in profile)
+
+    with tempfile.TemporaryDirectory() as sandbox:
+        os.makedirs(os.path.join(sandbox, "code-files"))
+        with open(os.path.join(sandbox, "script.json"), "w") as f:
+            json.dump({"turns": [{"steps": [{"text": "hi"}]}]}, f)
+        shots = [_single_shot(sandbox) * 1000 for _ in range(args.runs)]
+
+    total, own, shot = statistics.median(totals), statistics.median(owned), statistics.median(shots)
+    print(f"import main: {total:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"agent-owned: {own:8.1f} ms  (budget {args.own_budget_ms:.0f} ms)")
+    print(f"single-shot: {shot:8.1f} ms  (fake model, cold start to exit)")
+    if loaded:
+        print(f"loaded at startup but should be lazy: {', '.join(sorted(loaded))}")
+
+    if args.check:
+        failed = bool(loaded) or total > args.budget_ms or own > args.own_budget_ms
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
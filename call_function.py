@@ -1,12 +1,23 @@
 from functions.get_files_info import get_files_info
 from functions.read import read
 from functions.write import write
+from functions.edit import edit
 from functions.run_python import run_python
+from functions.run_tests import run_tests
 from functions.delete import delete
 from functions.search_memory import search_memory
+from functions.batch import batch
+from functions.search_code import search_code
+from functions import code_index
 from google.genai import types
-
-working_directory="code-files"
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import MAX_TOOL_WORKERS
+import contextvars
+import os
+import session
+import tool_cache
+import tracing
+from tool_kinds import MUTATING_TOOLS, call_path, runs_scripts
 
 def call_function(function_call_part, verbose=False):
     if verbose :
@@ -16,39 +27,110 @@ def call_function(function_call_part, verbose=False):
 
 
 
-    result=""
-    if function_call_part.name == "get_files_info":
-        result = get_files_info(working_directory,**function_call_part.args)
-    if function_call_part.name == "read":
-        result = read(working_directory,**function_call_part.args)
-    if function_call_part.name == "write":
-        result = write(working_directory,**function_call_part.args)
-    if function_call_part.name == "run_python":
-        result = run_python(working_directory,**function_call_part.args)
-    if function_call_part.name == "delete":
-        result = delete(working_directory,**function_call_part.args)
-    if function_call_part.name == "search_memory":
-        result = search_memory(**function_call_part.args)
-    if result=="":
-        return types.Content(
-            role="tool",
-            parts=[
-                types.Part.from_function_response(
-                    name=function_call_part.name,
-                    response={"error": f"Unknown function: {function_call_part.name}"},
-                )
-            ],
+    # time spent inside the tool, including cache lookups; one span per call
+    with tracing.span("tool", tool=function_call_part.name) as span:
+        cache_key = tool_cache.make_key(
+            function_call_part.name, function_call_part.args, call_path(function_call_part)
         )
+        result = tool_cache.get(cache_key)
+        if result is not None:
+            if verbose:
+                print(f"   (cached result for {function_call_part.name})")
+            span.tag(cached=True, result_chars=len(result))
+            return _tool_response(function_call_part.name, result)
+
+        # the session's sandbox: "code-files" for the CLI, per session in server mode
+        working_directory = session.sandbox()
+        result=""
+        if function_call_part.name == "get_files_info":
+            result = get_files_info(working_directory,**function_call_part.args)
+        if function_call_part.name == "read":
+            result = read(working_directory,**function_call_part.args)
+        if function_call_part.name == "write":
+            result = write(working_directory,**function_call_part.args)
+        if function_call_part.name == "edit":
+            result = edit(working_directory,**function_call_part.args)
+        if function_call_part.name == "run_python":
+            # in verbose mode the script's output is also echoed live
+            result = run_python(working_directory, echo=verbose, **function_call_part.args)
+        if function_call_part.name == "run_tests":
+            result = run_tests(working_directory, echo=verbose, **function_call_part.args)
+        if function_call_part.name == "delete":
+            result = delete(working_directory,**function_call_part.args)
+        if function_call_part.name == "search_memory":
+            result = search_memory(**function_call_part.args)
+        if function_call_part.name == "batch":
+            result = batch(working_directory, echo=verbose, **function_call_part.args)
+        if function_call_part.name == "search_code":
+            result = search_code(working_directory, **function_call_part.args)
+        if function_call_part.name in MUTATING_TOOLS:
+            tool_cache.invalidate(call_path(function_call_part))
+            code_index.path_changed(call_path(function_call_part))
+        elif runs_scripts(function_call_part):
+            # a script can change any file in the sandbox
+            tool_cache.clear()
+            code_index.invalidate()
+        if result=="":
+            return types.Content(
+                role="tool",
+                parts=[
+                    types.Part.from_function_response(
+                        name=function_call_part.name,
+                        response={"error": f"Unknown function: {function_call_part.name}"},
+                    )
+                ],
+            )
+        span.tag(result_chars=len(result))
+        tool_cache.put(cache_key, result)
+        return _tool_response(function_call_part.name, result)
+
+
+def _tool_response(name, result):
     return types.Content(
         role="tool",
         parts=[
             types.Part.from_function_response(
-                name=function_call_part.name,
+                name=name,
                 response={"result": result},
             )
         ],
     )
 
 
+def conflicts(a, b):
+    """True if two calls must run in their original order (also used by plan_executor)."""
+    if a.name not in MUTATING_TOOLS and b.name not in MUTATING_TOOLS:
+        return False
+    # a script may read or write any file, so order it against every mutation
+    if runs_scripts(a) or runs_scripts(b):
+        return True
+    pa, pb = call_path(a), call_path(b)
+    if pa is None or pb is None:
+        return False
+    return pa == pb or pa.startswith(pb + os.sep) or pb.startswith(pa + os.sep)
+
+
+def call_functions(function_call_parts, verbose=False, max_workers=MAX_TOOL_WORKERS):
+    """Run a turn's function calls concurrently, returning results in call order.
+
+    Each call waits for every earlier call it conflicts with (e.g. a write and a
+    read of the same path), so the outcome matches sequential execution.
+    """
+    parts = list(function_call_parts)
+    if max_workers <= 1 or len(parts) <= 1:
+        return [call_function(part, verbose) for part in parts]
+
+    futures = []
+
+    def run(index):
+        deps = [futures[i] for i in range(index) if conflicts(parts[i], parts[index])]
+        wait(deps)
+        return call_function(parts[index], verbose)
 
-    
\ No newline at end of file
+    # the executor dequeues in submission order, so a dependency is always
+    # running or done before a later call starts waiting on it
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(parts))) as pool:
+        for index in range(len(parts)):
+            # each call runs in a copy of this context, so its spans nest under the turn
+            futures.append(pool.submit(contextvars.copy_context().run, run, index))
+        return [future.result() for future in futures]
@@ -0,0 +1,143 @@
+"""Thin command-line client for the agent server (main.py --serve).
+
+    python client.py "list files" [-s] [-x] [-v] [--no-cache] [--session NAME]
+    python client.py                  # interactive, like main.py
+    python client.py --stats          # the server's latency/queue statistics
+
+Only the standard library is loaded, so a prompt costs a request to the warm
+server instead of a cold start. CODEGEN_SERVER selects the server, either
+"http://host:port" (default SERVER_HOST:SERVER_PORT from config.py) or
+"unix:/path/to.sock". When no server is listening, a prompt runs in-process
+through main.py instead (--stats fails).
+"""
+import http.client
+import json
+import os
+import socket
+import sys
+from urllib.parse import urlsplit
+from config import SERVER_HOST, SERVER_PORT
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+def _connect():
+    address = os.environ.get("CODEGEN_SERVER", f"http://{SERVER_HOST}:{SERVER_PORT}")
+    if address.startswith("unix:"):
+        return _UnixConnection(address[len("unix:"):])
+    parts = urlsplit(address)
+    return http.client.HTTPConnection(parts.hostname or SERVER_HOST, parts.port or SERVER_PORT)
+
+
+def _request(conn, method, path, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+
+def _run_locally():
+    """No server: fall back to the in-process (cold start) path."""
+    argv = []
+    skip = False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg == "--session":
+            skip = True  # main.py has a single session
+        else:
+            argv.append(arg)
+    os.execv(sys.executable, [sys.executable, os.path.join(ROOT, "main.py"), *argv])
+
+
+def _parse(words):
+    """Split prompt words from flags; returns (prompt, options)."""
+    options = {"verbose": False, "structured": False, "execute": False, "no_cache": False, "session": None}
+    prompt = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word in ("-v", "--verbose"):
+            options["verbose"] = True
+        elif word in ("-s", "--structured"):
+            options["structured"] = True
+        elif word in ("-x", "--execute"):
+            options["execute"] = True
+        elif word == "--no-cache":
+            options["no_cache"] = True
+        elif word == "--session" and i + 1 < len(words):
+            options["session"] = words[i + 1]
+            i += 1
+        elif word not in ("--stream", "--no-stream"):  # answers always arrive whole
+            prompt.append(word)
+        i += 1
+    return " ".join(prompt), options
+
+
+def _ask(conn, prompt, options):
+    status, body = _request(conn, "POST", "/prompt", {"prompt": prompt, **options})
+    if status != 200:
+        return f"Error: {body.get('error', status)}"
+    if options["verbose"]:
+        print(f"Server: {body['latency_ms'] / 1000:.2f}s, queued {body['queue_ms'] / 1000:.2f}s (session {body['session']})")
+    return body["response"]
+
+
+def main():
+    conn = _connect()
+    try:
+        if sys.argv[1:] == ["--stats"]:
+            print(json.dumps(_request(conn, "GET", "/stats")[1], indent=2))
+            return
+        if len(sys.argv) >= 2:
+            # like main.py: the prompt is the first argument, flags follow
+            _, options = _parse(sys.argv[2:])
+            print(_ask(conn, sys.argv[1], options))
+            return
+        _request(conn, "GET", "/health")
+    except (ConnectionError, FileNotFoundError, socket.gaierror) as e:
+        if sys.argv[1:] == ["--stats"]:
+            # statistics only exist on a server; main.py would take "--stats" for a prompt
+            print(f"Error: no CodeGen server is listening ({e})", file=sys.stderr)
+            sys.exit(1)
+        _run_locally()
+
+    print("🤖 CodeGen AI Coding Agent (connected to server)")
+    print("Type 'exit' or press Ctrl+C to quit")
+    print("Use -v or --verbose for timings, -s or --structured for the JSON plan, --session NAME to switch sessions")
+    print("-" * 50)
+    session = None
+    while True:
+        try:
+            user_input = input("\n💬 You: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print("\n\nGoodbye! 👋")
+            return
+        if user_input.lower() in ["exit", "quit", "bye"]:
+            print("\nGoodbye! 👋")
+            return
+        prompt, options = _parse(user_input.split())
+        # --session sticks for the rest of the conversation
+        session = options["session"] = options["session"] or session
+        if not prompt:
+            continue
+        try:
+            print("\n🤖 CodeGen:", _ask(conn, prompt, options))
+        except (ConnectionError, http.client.HTTPException) as e:
+            conn.close()
+            print(f"\n❌ Error: lost the server ({e}); reconnecting on the next prompt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+from google.genai import types
+from config import CONTEXT_TOKEN_BUDGET, COMPACT_KEEP_RECENT
+from tool_kinds import MUTATING_TOOLS, call_path
+
+# rough local estimate until the model reports real prompt token counts
+CHARS_PER_TOKEN = 4
+# results shorter than this are not worth replacing with a stub
+MIN_ELIDE_CHARS = 200
+
+
+def _part_chars(part):
+    if part.text:
+        return len(part.text)
+    if part.function_call is not None:
+        return len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response is not None:
+        return len(json.dumps(part.function_response.response or {}, default=str))
+    return 0
+
+
+def estimate_chars(messages):
+    return sum(_part_chars(part) for content in messages for part in (content.parts or []))
+
+
+class ContextBudget:
+    """Keeps one turn's message history under a prompt-token budget.
+
+    The projection for the next call is the prompt token count the model last
+    reported plus a local estimate for whatever changed since, so the fixed
+    system prompt and tool schemas are counted exactly. When it is over budget,
+    old tool results are swapped for short stubs: first the ones superseded by
+    a later call on the same path (a read of a file that was later rewritten
+    or re-read, an outdated listing), then the oldest ones. The
+    function_response parts stay in place, so every function call still has
+    its matching response.
+    """
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, keep_recent=COMPACT_KEEP_RECENT):
+        self.budget = budget
+        self.keep_recent = keep_recent
+        self.reported_tokens = 0
+        self.reported_chars = 0
+        self.saved_tokens = 0
+
+    def observe(self, usage_metadata, messages):
+        """Record the prompt tokens the model reported for sending messages."""
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+        if prompt_tokens:
+            self.reported_tokens = prompt_tokens
+            self.reported_chars = estimate_chars(messages)
+
+    def projected_tokens(self, messages):
+        delta = estimate_chars(messages) - self.reported_chars
+        return max(0, self.reported_tokens + delta // CHARS_PER_TOKEN)
+
+    def _tool_results(self, messages):
+        """Yield (message index, function call) for every tool response."""
+        pending = []
+        for index, content in enumerate(messages):
+            for part in content.parts or []:
+                if part.function_call is not None:
+                    pending.append(part.function_call)
+                elif part.function_response is not None and pending:
+                    yield index, pending.pop(0)
+
+    def compact(self, messages):
+        """Elide stale tool results in place; returns estimated tokens saved."""
+        if self.budget is None or self.projected_tokens(messages) <= self.budget:
+            return 0
+        results = list(self._tool_results(messages))
+        # results the model has not seen yet, and the latest few it has, stay verbatim
+        last_model = max((i for i, c in enumerate(messages) if c.role == "model"), default=-1)
+        seen = [r for r in results if r[0] < last_model]
+        candidates = seen[: max(0, len(seen) - self.keep_recent)]
+
+        superseded = []
+        for pos, (index, call) in enumerate(candidates):
+            path = call_path(call)
+            if path is None or call.name in MUTATING_TOOLS:
+                continue
+            for _, later in results[pos + 1:]:
+                if call_path(later) != path:
+                    continue
+                if later.name in MUTATING_TOOLS or (later.name == call.name and later.args == call.args):
+                    superseded.append((index, call, "superseded by a later call on the same path"))
+                    break
+        stale = {index for index, _, _ in superseded}
+        older = [(index, call, "old result") for index, call in candidates if index not in stale]
+
+        saved_chars = 0
+        for index, call, reason in superseded + older:
+            if self.projected_tokens(messages) <= self.budget:
+                break
+            saved_chars += self._elide(messages, index, call, reason)
+        saved = saved_chars // CHARS_PER_TOKEN
+        self.saved_tokens += saved
+        return saved
+
+    def _elide(self, messages, index, call, reason):
+        content = messages[index]
+        before = estimate_chars([content])
+        if before < MIN_ELIDE_CHARS or any(
+            str((part.function_response.response or {}).get("result", "")).startswith("[elided ")
+            for part in content.parts or []
+            if part.function_response is not None
+        ):
+            return 0
+        parts = []
+        for part in content.parts or []:
+            if part.function_response is not None:
+                args = json.dumps(call.args or {}, default=str)
+                stub = f"[elided {before} chars ({reason}); call {call.name}({args}) again if needed]"
+                part = types.Part.from_function_response(
+                    name=part.function_response.name, response={"result": stub}
+                )
+            parts.append(part)
+        messages[index] = types.Content(role=content.role, parts=parts)
+        return before - estimate_chars([messages[index]])
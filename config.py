@@ -1,4 +1,56 @@
 MAX_CHARS=1000
 MAX_WRITE_CHARS=20000
 MAX_RUN_ARGS=10
-MAX_ARG_LEN=200
\ No newline at end of file
+MAX_ARG_LEN=200
+MAX_TOOL_WORKERS=4
+STREAM_INTERACTIVE=True
+BATCH_CONCURRENCY=4
+TOOL_CACHE_SIZE=128
+READ_MMAP_THRESHOLD=1048576
+LIST_MAX_ENTRIES=200
+LIST_MAX_DEPTH=5
+RUN_PYTHON_WARM=False
+WARM_POOL_SIZE=2
+WARM_MAX_RUNS=50
+WARM_PRELOAD_MODULES=["json", "re", "collections", "itertools"]
+RUN_OUTPUT_HEAD=4000
+RUN_OUTPUT_TAIL=4000
+RUN_OUTPUT_HARD_LIMIT=52428800
+CONTEXT_TOKEN_BUDGET=32000
+COMPACT_KEEP_RECENT=2
+PROFILE_TRACE_FILE="db/trace.jsonl"
+PROFILE_METRICS_FILE="db/metrics.prom"
+BATCH_TOOL_MAX_OPS=16
+BATCH_TOOL_MAX_CHARS=12000
+MEMORY_SEMANTIC=False
+MEMORY_SEMANTIC_WEIGHT=0.5
+MEMORY_SEMANTIC_MIN_SCORE=0.35
+SEARCH_CODE_MAX_RESULTS=50
+CODE_INDEX_MAX_FILE_BYTES=1048576
+CODE_INDEX_RESCAN_S=2.0
+RESPONSE_CACHE=True
+RESPONSE_CACHE_TEXT=False
+RESPONSE_CACHE_TTL_S=3600
+RESPONSE_CACHE_MAX_ENTRIES=256
+MODEL_RPM=60
+MODEL_TPM=1000000
+MODEL_MAX_CONCURRENCY=8
+MODEL_MAX_RETRIES=5
+MODEL_BACKOFF_BASE_S=1.0
+MODEL_BACKOFF_MAX_S=32.0
+SERVER_HOST="127.0.0.1"
+SERVER_PORT=8765
+SERVER_MAX_CONCURRENCY=4
+SERVER_SESSIONS_DIR="sessions"
+SERVER_LATENCY_WINDOW=1000
+RUN_TESTS_MAX_FILES=64
+RUN_TESTS_TIMEOUT_S=30
+RUN_TESTS_WORKERS=0
+RUN_TESTS_EXCERPT_CHARS=600
+RUN_TESTS_MAX_CHARS=8000
+MEMORY_CONTEXT_TOKENS=400
+MEMORY_CONTEXT_ENTRY_TOKENS=120
+MEMORY_CONTEXT_RECENT=3
+MEMORY_CONTEXT_RELEVANT=5
+MEMORY_CONTEXT_RECENCY_WEIGHT=0.4
+MEMORY_CONTEXT_HALF_LIFE=3
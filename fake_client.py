@@ -0,0 +1,196 @@
+"""Scripted stand-in for genai.Client, for benchmarks and offline runs.
+
+A script is a JSON object (or the path of a file holding one):
+
+    {
+      "latency_s": 0.05,
+      "turns": [
+        {"match": "fizzbuzz", "steps": [
+          {"calls": [{"name": "write", "args": {"file_path": "f.py", "content": "..."}}]},
+          {"calls": [{"name": "run_python", "args": {"file_path": "f.py"}}], "latency_s": 0.2},
+          {"text": "Done."}
+        ]}
+      ]
+    }
+
+Each prompt replays the first turn whose "match" occurs in it (a turn without
+"match" matches anything). Step i answers the model call made after i model
+messages are already in the history, so the fake keeps no per-conversation
+state and is safe to share between concurrent prompts. A turn that runs out
+of steps repeats its last one.
+
+Failures can be injected to exercise retries and throttling (all optional):
+
+    {
+      "fail_rate": 0.1, "fail_status": 503, "seed": 1,   # random errors
+      "quota": {"requests": 5, "window_s": 1.0},          # 429 past 5 calls per second
+      "retry_after_s": 0.5,                               # RetryInfo sent with each 429
+      "turns": [{"steps": [{"fail": [429, 500], "text": "ok"}]}]
+    }
+
+A step's "fail" list makes its first attempts raise those statuses in order
+(counted per prompt), after which it answers normally. Errors are the
+google.genai ClientError/ServerError the real client raises.
+"""
+import asyncio
+import collections
+import json
+import random
+import threading
+import time
+from google.genai import errors, types
+
+CHARS_PER_TOKEN = 4
+
+
+def _chars(contents):
+    total = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                total += len(part.text)
+            elif part.function_call is not None:
+                total += len(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response is not None:
+                total += len(json.dumps(part.function_response.response or {}, default=str))
+    return total
+
+
+class _Script:
+    def __init__(self, script):
+        if isinstance(script, str):
+            with open(script, "r") as f:
+                script = json.load(f)
+        self.latency_s = float(script.get("latency_s", 0.0))
+        self.turns = script.get("turns") or [{"steps": [{"text": "ok"}]}]
+        self.calls = 0
+        self.failures = 0
+        self.fail_rate = float(script.get("fail_rate", 0.0))
+        self.fail_status = int(script.get("fail_status", 503))
+        self.quota = script.get("quota")
+        self.retry_after_s = script.get("retry_after_s")
+        self._random = random.Random(script.get("seed"))
+        self._lock = threading.Lock()
+        self._attempts = collections.Counter()  # (prompt, step index) -> attempts so far
+        self._recent = collections.deque()  # monotonic times of calls inside the quota window
+
+    def step(self, contents):
+        prompt = ""
+        if contents and contents[0].parts and contents[0].parts[0].text:
+            prompt = contents[0].parts[0].text
+        turn = next(
+            (t for t in self.turns if not t.get("match") or t["match"] in prompt),
+            self.turns[-1],
+        )
+        steps = turn["steps"]
+        index = sum(1 for c in contents if c.role == "model")
+        step = steps[min(index, len(steps) - 1)]
+        with self._lock:
+            self.calls += 1
+            status = self._injected_failure(step, (prompt, index))
+            if status is not None:
+                self.failures += 1
+        if status is not None:
+            self._raise(status)
+        return step
+
+    def _injected_failure(self, step, key):
+        attempt = self._attempts[key]
+        self._attempts[key] += 1
+        planned = step.get("fail") or []
+        if attempt < len(planned):
+            return int(planned[attempt])
+        if self.quota:
+            now = time.monotonic()
+            window = float(self.quota.get("window_s", 60.0))
+            while self._recent and now - self._recent[0] >= window:
+                self._recent.popleft()
+            if len(self._recent) >= int(self.quota["requests"]):
+                return 429
+            self._recent.append(now)
+        if self.fail_rate and self._random.random() < self.fail_rate:
+            return self.fail_status
+        return None
+
+    def _raise(self, status):
+        error = {"code": status, "message": f"injected failure ({status})", "status": "INJECTED"}
+        if status == 429 and self.retry_after_s is not None:
+            error["details"] = [{
+                "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                "retryDelay": f"{self.retry_after_s}s",
+            }]
+        cls = errors.ClientError if status < 500 else errors.ServerError
+        raise cls(status, {"error": error})
+
+    def latency(self, step):
+        return float(step.get("latency_s", self.latency_s))
+
+    def response(self, step, contents):
+        if step.get("calls"):
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=c["name"], args=c.get("args", {})))
+                for c in step["calls"]
+            ]
+        else:
+            parts = [types.Part(text=step.get("text", ""))]
+        output_chars = sum(len(json.dumps(p.function_call.args)) if p.function_call else len(p.text) for p in parts)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=max(1, _chars(contents) // CHARS_PER_TOKEN),
+                candidates_token_count=max(1, output_chars // CHARS_PER_TOKEN),
+            ),
+        )
+
+
+class _Models:
+    def __init__(self, script):
+        self._script = script
+
+    def generate_content(self, model, contents, config=None):
+        step = self._script.step(contents)
+        time.sleep(self._script.latency(step))
+        return self._script.response(step, contents)
+
+    def generate_content_stream(self, model, contents, config=None):
+        step = self._script.step(contents)
+        response = self._script.response(step, contents)
+        latency = self._script.latency(step)
+        text = step.get("text")
+        if step.get("calls") or not text:
+            time.sleep(latency)
+            yield response
+            return
+        # split the text into a few chunks spread over the step's latency
+        pieces = [text[i:i + 16] for i in range(0, len(text), 16)]
+        for n, piece in enumerate(pieces):
+            time.sleep(latency / len(pieces))
+            last = n == len(pieces) - 1
+            yield types.GenerateContentResponse(
+                candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=piece)]))],
+                usage_metadata=response.usage_metadata if last else None,
+            )
+
+
+class _AsyncModels:
+    def __init__(self, script):
+        self._script = script
+
+    async def generate_content(self, model, contents, config=None):
+        step = self._script.step(contents)
+        await asyncio.sleep(self._script.latency(step))
+        return self._script.response(step, contents)
+
+
+class _Aio:
+    def __init__(self, script):
+        self.models = _AsyncModels(script)
+
+
+class FakeClient:
+    """Replays a script instead of calling Gemini; see the module docstring."""
+
+    def __init__(self, script):
+        self.script = _Script(script)
+        self.models = _Models(self.script)
+        self.aio = _Aio(self.script)
@@ -0,0 +1,100 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from config import BATCH_TOOL_MAX_OPS, BATCH_TOOL_MAX_CHARS, MAX_TOOL_WORKERS
+from functions.get_files_info import get_files_info
+from functions.read import read
+from functions.run_python import run_python
+from google.genai import types
+
+OPS = ("read", "list", "run")
+
+
+def _run_op(working_directory, op, echo):
+    kind, path = op.get("op"), op.get("path")
+    if kind not in OPS:
+        return f'Error: unknown op "{kind}" (expected one of {", ".join(OPS)})'
+    if kind == "list":
+        kwargs = {k: op[k] for k in ("recursive", "pattern") if op.get(k) is not None}
+        return get_files_info(working_directory, path or ".", **kwargs)
+    if not path:
+        return f'Error: "{kind}" needs a path'
+    if kind == "read":
+        kwargs = {k: op[k] for k in ("start_line", "end_line") if op.get(k) is not None}
+        return read(working_directory, path, **kwargs)
+    return run_python(working_directory, path, op.get("args") or [], echo=echo)
+
+
+def batch(working_directory: str, operations=None, echo=False):
+    if not isinstance(operations, list) or not operations:
+        return 'Error: "operations" must be a non-empty list'
+    if len(operations) > BATCH_TOOL_MAX_OPS:
+        return f"Error: too many operations (>{BATCH_TOOL_MAX_OPS})"
+    if any(not isinstance(op, dict) for op in operations):
+        return 'Error: each operation must be an object with "op" and "path"'
+
+    # reads and listings run concurrently; a run waits for everything before
+    # it and blocks everything after it, since the script may change files
+    results = [None] * len(operations)
+    with ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS) as pool:
+        pending = []
+        for index, op in enumerate(operations):
+            if op.get("op") == "run":
+                for i, future in pending:
+                    results[i] = future.result()
+                pending = []
+                results[index] = _run_op(working_directory, op, echo)
+            else:
+                future = pool.submit(contextvars.copy_context().run, _run_op, working_directory, op, echo)
+                pending.append((index, future))
+        for i, future in pending:
+            results[i] = future.result()
+
+    sections = []
+    used = 0
+    for index, (op, result) in enumerate(zip(operations, results)):
+        section = f"[{index + 1}/{len(operations)}] {op.get('op')} {op.get('path') or '.'}\n{result.rstrip()}\n"
+        if used + len(section) > BATCH_TOOL_MAX_CHARS:
+            room = BATCH_TOOL_MAX_CHARS - used
+            if room > 0:
+                sections.append(section[:room])
+            sections.append(
+                f"[...batch output truncated at {BATCH_TOOL_MAX_CHARS} characters; "
+                f"{len(operations) - index} of {len(operations)} operations not fully shown]\n"
+            )
+            break
+        sections.append(section)
+        used += len(section)
+    return "\n".join(sections)
+
+
+schema_batch = types.FunctionDeclaration(
+    name="batch",
+    description=(
+        "Runs several read/list/run operations in one call and returns their results together "
+        "(size-limited). Prefer this over separate calls when you already know what to look at."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "operations": types.Schema(
+                type=types.Type.ARRAY,
+                description="Operations, executed in order; reads and lists between runs happen concurrently.",
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "op": types.Schema(type=types.Type.STRING, enum=list(OPS), description="read, list or run"),
+                        "path": types.Schema(type=types.Type.STRING, description="File to read/run or directory to list"),
+                        "start_line": types.Schema(type=types.Type.INTEGER, description="read: first line (1-based)"),
+                        "end_line": types.Schema(type=types.Type.INTEGER, description="read: last line (inclusive)"),
+                        "recursive": types.Schema(type=types.Type.BOOLEAN, description="list: include subdirectories"),
+                        "pattern": types.Schema(type=types.Type.STRING, description="list: glob filter, e.g. *.py"),
+                        "args": types.Schema(
+                            type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING), description="run: CLI args"
+                        ),
+                    },
+                    required=["op"],
+                ),
+            ),
+        },
+    ),
+)
@@ -0,0 +1,254 @@
+import os
+import pickle
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from config import CODE_INDEX_MAX_FILE_BYTES, CODE_INDEX_RESCAN_S
+from functions.get_files_info import SKIP_DIRS
+import session
+
+# trigrams of lowercased file bytes; a superset filter for both literal and
+# regex queries, which are then verified against the file itself. Stored in
+# the session's memory directory, one sandbox per file.
+INDEX_NAME = "code.trigrams.pickle"
+BINARY_SNIFF_BYTES = 8192
+
+_lock = threading.RLock()
+_indexes: Dict[str, "_CodeIndex"] = {}  # sandbox root -> its index, loaded on first use
+
+
+class _CodeIndex:
+    def __init__(self, root: str):
+        self.root = root
+        self.files: Dict[str, tuple] = {}  # rel path -> (mtime_ns, size)
+        self.ids: Dict[str, int] = {}  # rel path -> file id (a bit position)
+        self.paths: List[Optional[str]] = []  # file id -> rel path; None when free
+        self.free: List[int] = []  # ids of removed files, reused before growing
+        self.grams: Dict[str, bytes] = {}  # rel path -> its sorted trigrams, concatenated
+        # trigram -> bitset of file ids; intersecting a query's trigrams is a few big-int ANDs,
+        # and the whole index pickles as a handful of ints and byte strings
+        self.postings: Dict[bytes, int] = {}
+        self.scanned_at = 0.0  # time.monotonic() of the last full scan (not persisted)
+        self.dirty = False
+
+    def add(self, rel: str, signature: tuple, grams: FrozenSet[bytes]) -> None:
+        self.remove(rel)
+        if self.free:
+            file_id = self.free.pop()
+            self.paths[file_id] = rel
+        else:
+            file_id = len(self.paths)
+            self.paths.append(rel)
+        self.ids[rel] = file_id
+        self.files[rel] = signature
+        blob = b"".join(sorted(grams))
+        self.grams[rel] = blob
+        bit = 1 << file_id
+        postings = self.postings
+        for i in range(0, len(blob), 3):
+            gram = blob[i:i + 3]
+            postings[gram] = postings.get(gram, 0) | bit
+        self.dirty = True
+
+    def remove(self, rel: str) -> None:
+        if rel not in self.files:
+            return
+        del self.files[rel]
+        file_id = self.ids.pop(rel)
+        self.paths[file_id] = None
+        self.free.append(file_id)
+        mask = ~(1 << file_id)
+        blob = self.grams.pop(rel, b"")
+        for i in range(0, len(blob), 3):
+            gram = blob[i:i + 3]
+            bits = self.postings.get(gram, 0) & mask
+            if bits:
+                self.postings[gram] = bits
+            else:
+                self.postings.pop(gram, None)
+        self.dirty = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["scanned_at"] = 0.0
+        state["dirty"] = False
+        return state
+
+
+def trigrams(data: bytes) -> FrozenSet[bytes]:
+    data = data.lower()
+    return frozenset(data[i:i + 3] for i in range(len(data) - 2))
+
+
+def _index_file(index: _CodeIndex, rel: str, abs_path: str, st) -> None:
+    if st.st_size > CODE_INDEX_MAX_FILE_BYTES:
+        index.remove(rel)
+        return
+    try:
+        with open(abs_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        index.remove(rel)
+        return
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        index.remove(rel)
+        return
+    index.add(rel, (st.st_mtime_ns, st.st_size), trigrams(data))
+
+
+def _scan(index: _CodeIndex) -> None:
+    """Re-index files whose (mtime, size) changed and drop vanished ones."""
+    seen = set()
+    stack = [(index.root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = prefix + entry.name
+            try:
+                # symlinks are not followed: a link could lead out of the sandbox or into a loop
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append((entry.path, rel + "/"))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            seen.add(rel)
+            if index.files.get(rel) != (st.st_mtime_ns, st.st_size):
+                _index_file(index, rel, entry.path, st)
+    for rel in [rel for rel in index.files if rel not in seen]:
+        index.remove(rel)
+    index.scanned_at = time.monotonic()
+
+
+def _load(root: str) -> _CodeIndex:
+    index = _indexes.get(root)
+    if index is None:
+        try:
+            with open(session.memory_path(INDEX_NAME), "rb") as f:
+                snap = pickle.load(f)
+            if isinstance(snap, _CodeIndex) and snap.root == root:
+                index = snap
+        except Exception:
+            pass
+        if index is None:
+            index = _CodeIndex(root)
+        _indexes[root] = index
+    return index
+
+
+def _save(index: _CodeIndex) -> None:
+    os.makedirs(session.memory_dir(), exist_ok=True)
+    index_file = session.memory_path(INDEX_NAME)
+    tmp = index_file + f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, index_file)
+    index.dirty = False
+
+
+def refresh(working_directory: str) -> _CodeIndex:
+    """Return the index of working_directory, brought up to date.
+
+    A full (mtime, size) scan runs at most every CODE_INDEX_RESCAN_S seconds;
+    in between, the write/delete hooks keep the index exact for the agent's
+    own changes. The index is persisted whenever it changed.
+    """
+    root = os.path.abspath(working_directory)
+    with _lock:
+        index = _load(root)
+        if time.monotonic() - index.scanned_at >= CODE_INDEX_RESCAN_S:
+            _scan(index)
+        if index.dirty:
+            _save(index)
+        return index
+
+
+def path_changed(abs_path: Optional[str]) -> None:
+    """Hook for write/delete: re-index (or drop) a path and everything under it."""
+    with _lock:
+        index = _indexes.get(os.path.abspath(session.sandbox()))
+        if index is None or abs_path is None:
+            return  # nothing loaded yet; the first refresh scans anyway
+        rel = os.path.relpath(abs_path, index.root).replace(os.sep, "/")
+        if rel == "." or rel.startswith("../"):
+            index.scanned_at = 0.0
+            return
+        for known in [k for k in index.files if k == rel or k.startswith(rel + "/")]:
+            index.remove(known)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return
+        if os.path.isdir(abs_path):
+            index.scanned_at = 0.0  # a new directory: let the next search scan it
+        else:
+            _index_file(index, rel, abs_path, st)
+
+
+def invalidate() -> None:
+    """Hook for run_python: a script may have changed anything, so rescan next time."""
+    with _lock:
+        index = _indexes.get(os.path.abspath(session.sandbox()))
+        if index is not None:
+            index.scanned_at = 0.0
+
+
+def _literal_runs(items, runs: List[str], current: List[str]) -> None:
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+        elif op is sre_parse.SUBPATTERN:
+            _literal_runs(arg[-1], runs, current)
+        else:
+            if current:
+                runs.append("".join(current))
+                current.clear()
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Literal substrings every match of a regex must contain (best effort)."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return []
+    if any(op is sre_parse.BRANCH for op, _ in parsed):
+        return []  # top-level alternation: no single literal is required
+    runs: List[str] = []
+    current: List[str] = []
+    _literal_runs(parsed, runs, current)
+    if current:
+        runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+def candidates(index: _CodeIndex, literals: Iterable[str]) -> List[str]:
+    """Files that contain every trigram of every literal (all files if none apply)."""
+    grams = set()
+    for literal in literals:
+        grams |= trigrams(literal.encode("utf-8"))
+    if not grams:
+        return sorted(index.files)
+    bits = -1
+    for gram in grams:
+        bits &= index.postings.get(gram, 0)
+        if not bits:
+            return []
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(index.paths[low.bit_length() - 1])
+        bits ^= low
+    return sorted(result)
@@ -0,0 +1,194 @@
+import difflib
+import json
+import os
+import re
+import tempfile
+from config import MAX_CHARS, MAX_WRITE_CHARS
+from google.genai import types
+import tracing
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditConflict(Exception):
+    pass
+
+
+def _apply_replacements(text, edits):
+    for n, edit in enumerate(edits, 1):
+        if not isinstance(edit, dict) or not isinstance(edit.get("search"), str) or not edit["search"]:
+            raise EditConflict(f'edit {n}: needs a non-empty "search" string')
+        search, replace = edit["search"], edit.get("replace") or ""
+        found = text.count(search)
+        if found == 0:
+            raise EditConflict(f"edit {n}: search text not found")
+        if found > 1 and not edit.get("replace_all"):
+            raise EditConflict(f"edit {n}: search text matches {found} places; add context or set replace_all")
+        text = text.replace(search, replace)
+    return text
+
+
+def _parse_diff(diff):
+    """Return [(old start line, old lines, new lines)] from a unified diff."""
+    hunks = []
+    current = None
+    old_left = new_left = 0  # lines the current hunk header still promises
+    for line in diff.splitlines():
+        m = _HUNK_RE.match(line)
+        if m:
+            current = (int(m.group(1)), [], [])
+            hunks.append(current)
+            old_left = 1 if m.group(2) is None else int(m.group(2))
+            new_left = 1 if m.group(4) is None else int(m.group(4))
+            continue
+        if current is None or line.startswith("\\"):
+            continue  # text before the first hunk, "\ No newline at end of file"
+        if old_left <= 0 and new_left <= 0 and line.startswith(("--- ", "+++ ")):
+            continue  # the next file's headers; inside a hunk "--- x" is a removed "-- x"
+        if line.startswith("-"):
+            current[1].append(line[1:])
+            old_left -= 1
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+            new_left -= 1
+        else:
+            # context; a blank line is context whose leading space was stripped
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+            old_left -= 1
+            new_left -= 1
+    if not hunks:
+        raise EditConflict("diff has no @@ hunks")
+    return hunks
+
+
+def _find_block(lines, block, start, expected):
+    """Index where block matches lines: at expected if possible, else the unique match after start."""
+    size = len(block)
+    if lines[expected:expected + size] == block:
+        return expected
+    matches = [i for i in range(start, len(lines) - size + 1) if lines[i:i + size] == block]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _apply_diff(text, diff):
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.splitlines()
+    trailing_newline = text.endswith(("\n", "\r"))
+    delta = 0
+    done = 0  # lines before this index were already produced by earlier hunks
+    for n, (old_start, old, new) in enumerate(_parse_diff(diff), 1):
+        if not old:
+            # pure insertion: "-k,0" inserts after line k
+            at = max(done, old_start + delta)
+        else:
+            at = _find_block(lines, old, done, max(done, old_start - 1 + delta))
+            if at is None:
+                raise EditConflict(f"hunk {n} (line {old_start}): context does not match the file")
+        lines[at:at + len(old)] = new
+        delta += len(new) - len(old)
+        done = at + len(new)
+    return newline.join(lines) + (newline if trailing_newline and lines else "")
+
+
+def atomic_write(abs_file_path, text, expected_stat=None):
+    """Replace a file's content through a temp file and os.replace.
+
+    Readers see the old or the new file, never a partial one. With
+    expected_stat, refuse (EditConflict) if the file changed since it was read.
+    """
+    directory = os.path.dirname(abs_file_path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".edit-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if expected_stat is not None:
+            st = os.stat(abs_file_path)
+            if (st.st_mtime_ns, st.st_size) != (expected_stat.st_mtime_ns, expected_stat.st_size):
+                raise EditConflict("file changed on disk while the edit was being applied; read it again")
+            os.chmod(tmp, expected_stat.st_mode & 0o7777)
+        os.replace(tmp, abs_file_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _summary(file_path, old, new):
+    diff = [
+        line for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0)
+        if not line.startswith(("---", "+++"))
+    ]
+    added = sum(1 for line in diff if line.startswith("+"))
+    removed = sum(1 for line in diff if line.startswith("-"))
+    body = "\n".join(diff)
+    if len(body) > MAX_CHARS:
+        body = body[:MAX_CHARS] + "\n[...diff truncated]"
+    return f'Edited "{file_path}": +{added} -{removed} lines, now {len(new.splitlines())} lines\n{body}'
+
+
+def edit(working_directory: str, file_path: str, edits=None, diff=None):
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+    if not abs_file_path.startswith(abs_working_dir):
+        return f'Error: "{file_path}" is not in the working directory'
+    if not os.path.isfile(abs_file_path):
+        return f'Error: "{file_path}" is not a file; use write to create it'
+    if (edits is None) == (diff is None):
+        return 'Error: pass exactly one of "edits" or "diff"'
+    if edits is not None and not isinstance(edits, list):
+        return 'Error: "edits" must be a list of {search, replace} objects'
+    # the cap applies to what the model sends, not to the size of the file
+    payload = len(diff) if diff is not None else len(json.dumps(edits))
+    if payload > MAX_WRITE_CHARS:
+        return f"Error: edit payload exceeds MAX_WRITE_CHARS ({MAX_WRITE_CHARS})."
+
+    try:
+        with tracing.span("io.edit", file=file_path, payload=payload) as span:
+            with open(abs_file_path, "r", newline="") as f:
+                st = os.fstat(f.fileno())
+                old = f.read()
+            new = _apply_replacements(old, edits) if edits is not None else _apply_diff(old, diff)
+            if new == old:
+                return f'No changes: the edit leaves "{file_path}" as it is'
+            atomic_write(abs_file_path, new, st)
+            size = len(new.encode("utf-8"))
+            span.tag(bytes=size)
+        tracing.count("bytes", size, "written")
+        return _summary(file_path, old, new)
+    except EditConflict as e:
+        return f'Error: edit of "{file_path}" not applied: {e}'
+    except UnicodeDecodeError:
+        return f'Error: "{file_path}" is not a text file'
+    except Exception as e:
+        return f'Could not edit file:{abs_file_path}, error:{e}'
+
+
+schema_edit = types.FunctionDeclaration(
+    name="edit",
+    description=(
+        "Changes part of an existing file without resending it: either search/replace edits or a unified diff. "
+        "All changes apply or none do, and the result is a short diff summary. Prefer this over write for existing files."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "file_path": types.Schema(type=types.Type.STRING, description="File to edit"),
+            "edits": types.Schema(
+                type=types.Type.ARRAY,
+                description="Search/replace edits applied in order; each search text must match exactly once unless replace_all",
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "search": types.Schema(type=types.Type.STRING, description="Exact text to find"),
+                        "replace": types.Schema(type=types.Type.STRING, description="Replacement text"),
+                        "replace_all": types.Schema(type=types.Type.BOOLEAN, description="Replace every occurrence"),
+                    },
+                ),
+            ),
+            "diff": types.Schema(type=types.Type.STRING, description="Unified diff (@@ hunks) against the current file"),
+        },
+    ),
+)
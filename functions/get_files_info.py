@@ -1,28 +1,90 @@
 # Building Tool #1: Get Files Info
 
 import os
+from fnmatch import fnmatch
+from config import LIST_MAX_ENTRIES, LIST_MAX_DEPTH
 from google import genai
 from google.genai import types
+import tracing
 
-def get_files_info(working_directory:str, directory="."):
+# listed, but never descended into when recursing
+SKIP_DIRS = {".trash", ".git", "__pycache__"}
+SORT_KEYS = {
+    "name": lambda e: e[0],
+    "size": lambda e: (-e[1], e[0]),
+    "mtime": lambda e: (-e[3], e[0]),
+}
+
+
+def _walk(abs_directory, prefix, depth, max_depth, patterns, out):
+    with os.scandir(abs_directory) as it:
+        for entry in it:
+            rel = prefix + entry.name
+            try:
+                # DirEntry caches both of these, so each entry costs at most one stat call;
+                # a symlinked directory is listed but never descended into, so recursion
+                # cannot leave the sandbox or loop
+                is_directory = entry.is_dir()
+                descend = entry.is_dir(follow_symlinks=False)
+                st = entry.stat()
+            except OSError:
+                continue
+            if not patterns or any(fnmatch(entry.name, p) for p in patterns):
+                out.append((rel, st.st_size, is_directory, st.st_mtime))
+            if descend and depth < max_depth and entry.name not in SKIP_DIRS:
+                try:
+                    _walk(entry.path, rel + "/", depth + 1, max_depth, patterns, out)
+                except OSError:
+                    continue
+
+
+def get_files_info(working_directory:str, directory=".", recursive=False, max_depth=None, pattern=None, sort_by="name", cursor=None, max_entries=None):
     abs_working_directory=os.path.abspath(working_directory)
     abs_directory=os.path.abspath(os.path.join(working_directory, directory))
     if not abs_directory.startswith(abs_working_directory):
         return f'Error: "{directory}" is not in the working directory'
-    
-    final_response=""
-    contents=os.listdir(abs_directory)
-    for content in contents:
-        content_path=os.path.join(abs_directory, content)
-        is_directory=os.path.isdir(content_path)
-        size=os.path.getsize(content_path)
-        final_response+=f"-{content} : file_size={size} bytes, is_directory={is_directory}\n"
+    if not os.path.isdir(abs_directory):
+        return f'Error: "{directory}" is not a directory'
+    if sort_by not in SORT_KEYS:
+        return f'Error: "sort_by" must be one of {", ".join(SORT_KEYS)}'
+    try:
+        start = int(cursor) if cursor not in (None, "") else 0
+        limit = LIST_MAX_ENTRIES if max_entries is None else max(1, min(int(max_entries), LIST_MAX_ENTRIES))
+        depth_limit = 0
+        if recursive:
+            depth_limit = LIST_MAX_DEPTH if max_depth is None else max(0, min(int(max_depth), LIST_MAX_DEPTH))
+    except (TypeError, ValueError):
+        return 'Error: "cursor", "max_entries" and "max_depth" must be integers'
+    if start < 0:
+        return 'Error: "cursor" must not be negative'
 
-    return final_response
+    # "*.py,*.txt" filters on any of several globs
+    patterns = [p.strip() for p in (pattern or "").split(",") if p.strip()]
+    entries = []
+    try:
+        with tracing.span("io.list", directory=directory, recursive=bool(recursive)) as span:
+            _walk(abs_directory, "", 0, depth_limit, patterns, entries)
+            span.tag(entries=len(entries))
+    except OSError as e:
+        return f'Error: could not list "{directory}": {e}'
+    entries.sort(key=SORT_KEYS[sort_by])
+
+    page = entries[start:start + limit]
+    lines = [
+        f"-{rel} : file_size={size} bytes, is_directory={is_directory}\n"
+        for rel, size, is_directory, _ in page
+    ]
+    end = start + len(page)
+    if start > 0 or end < len(entries):
+        footer = f"[entries {start + 1}-{end} of {len(entries)}"
+        if end < len(entries):
+            footer += f'; pass cursor="{end}" for more'
+        lines.append(footer + "]\n")
+    return "".join(lines)
 
 schema_get_files_info = types.FunctionDeclaration(
     name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
+    description="Lists files in the specified directory along with their sizes, constrained to the working directory. Can recurse, filter by glob, sort, and page through large listings.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -30,6 +92,31 @@ schema_get_files_info = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
             ),
+            "recursive": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="List subdirectories too; entries are shown as paths relative to directory.",
+            ),
+            "max_depth": types.Schema(
+                type=types.Type.INTEGER,
+                description="How many directory levels below directory to descend when recursive.",
+            ),
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description="Glob filter on entry names, e.g. '*.py' or '*.py,*.txt'.",
+            ),
+            "sort_by": types.Schema(
+                type=types.Type.STRING,
+                enum=list(SORT_KEYS),
+                description="Sort order: name (default), size (largest first) or mtime (newest first).",
+            ),
+            "cursor": types.Schema(
+                type=types.Type.STRING,
+                description="Continue a truncated listing from the cursor given at its end.",
+            ),
+            "max_entries": types.Schema(
+                type=types.Type.INTEGER,
+                description="Maximum entries to return in one page.",
+            ),
         },
     ),
-)
\ No newline at end of file
+)
@@ -0,0 +1,97 @@
+"""Which memory entries go into the system prompt, and how much of each.
+
+Candidates are the last MEMORY_CONTEXT_RECENT records plus the best BM25
+matches for the prompt. Each one scores a blend of relevance (BM25, relative
+to the best match) and recency (halving every MEMORY_CONTEXT_HALF_LIFE
+records). The best are added until MEMORY_CONTEXT_TOKENS is spent, each cut at
+MEMORY_CONTEXT_ENTRY_TOKENS on a word or line boundary (older entries that do
+not match the prompt get a third of that), so the prompt carries what the
+model would otherwise fetch with search_memory.
+"""
+from typing import Dict, List, Tuple
+from config import (
+    MEMORY_CONTEXT_TOKENS, MEMORY_CONTEXT_ENTRY_TOKENS, MEMORY_CONTEXT_RECENT, MEMORY_CONTEXT_RELEVANT,
+    MEMORY_CONTEXT_RECENCY_WEIGHT, MEMORY_CONTEXT_HALF_LIFE,
+)
+from compaction import CHARS_PER_TOKEN
+from functions import memory_index, memory_store
+
+ELLIPSIS = " ..."
+FENCE = "```"
+# an entry is not worth adding with less room than this left (tokens)
+MIN_ENTRY_TOKENS = 24
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars on a word boundary, or a line boundary
+    inside a code block, which is then closed so the fence stays balanced."""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    limit = max(0, max_chars - len(ELLIPSIS))
+    cut = max(text.rfind(" ", 0, limit + 1), text.rfind("\n", 0, limit + 1))
+    if cut < limit // 2:
+        cut = limit  # one very long word
+    head = text[:cut].rstrip()
+    if head.count(FENCE) % 2:
+        start = head.rfind(FENCE)
+        if start >= limit // 3:
+            # enough prose before the block: drop the partial block
+            head = head[:start].rstrip()
+        else:
+            # keep whole lines of the block and close it
+            room = limit - len(FENCE) - 1
+            line_end = text.rfind("\n", start, room + 1)
+            head = text[:line_end if line_end > start else start].rstrip() + "\n" + FENCE
+    return head + ELLIPSIS
+
+
+def _candidates(prompt: str) -> Dict[int, Tuple[Dict, float]]:
+    """id -> (record, BM25 score) for the recent records and the prompt's best matches."""
+    found = {rec["id"]: (rec, 0.0) for rec in memory_store.recent_records(MEMORY_CONTEXT_RECENT) if "id" in rec}
+    if prompt.strip():
+        for position, score in memory_index.search_positions(prompt, MEMORY_CONTEXT_RELEVANT):
+            rec = memory_store.read_record(position)
+            if rec is not None and "id" in rec:
+                found[rec["id"]] = (rec, score)
+    return found
+
+
+def _render(rec: Dict, max_chars: int) -> str:
+    uq = (rec.get("user", "") or "").strip()
+    ua = (rec.get("assistant", "") or "").strip()
+    # the question is usually short; the answer gets what is left
+    uq = truncate(uq, max(40, max_chars // 3))
+    prefix = f"- #{rec['id']} Q: {uq}\n  A: "
+    return prefix + truncate(ua, max(0, max_chars - len(prefix))).replace("\n", "\n  ")
+
+
+def select(prompt: str, budget_tokens: int = MEMORY_CONTEXT_TOKENS) -> Tuple[List[str], List[int]]:
+    """Return (rendered entries, oldest first; their record ids)."""
+    found = _candidates(prompt)
+    if not found:
+        return [], []
+    newest = max(found)
+    best = max(score for _, score in found.values()) or 1.0
+
+    def score(rec_id: int) -> float:
+        relevance = found[rec_id][1] / best
+        recency = 0.5 ** ((newest - rec_id) / MEMORY_CONTEXT_HALF_LIFE)
+        return (1 - MEMORY_CONTEXT_RECENCY_WEIGHT) * relevance + MEMORY_CONTEXT_RECENCY_WEIGHT * recency
+
+    # the newest entry always goes first, for follow-ups like "explain more"
+    ranked = [newest] + sorted((i for i in found if i != newest), key=lambda i: (-score(i), -i))
+    left = budget_tokens * CHARS_PER_TOKEN
+    chosen = {}
+    for rec_id in ranked:
+        cap = MEMORY_CONTEXT_ENTRY_TOKENS
+        if rec_id != newest and found[rec_id][1] == 0:
+            cap //= 3  # only there for recency
+        room = min(left, cap * CHARS_PER_TOKEN)
+        if room < MIN_ENTRY_TOKENS * CHARS_PER_TOKEN:
+            break
+        entry = _render(found[rec_id][0], room)
+        chosen[rec_id] = entry
+        left -= len(entry) + 1
+    ids = sorted(chosen)
+    return [chosen[i] for i in ids], ids
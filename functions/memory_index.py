@@ -0,0 +1,204 @@
+import heapq
+import json
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from functions import memory_store
+from functions.memory_store import fcntl  # None off POSIX
+import session
+
+
+# one line per indexed record: [log position, document length, {term: tf}]
+POSTINGS_NAME = "memory.postings.jsonl"
+# pickled _Index covering a prefix of the postings file, so a cold start only
+# replays the lines written after it
+SNAPSHOT_NAME = "memory.postings.snapshot"
+SNAPSHOT_EVERY = 1000
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# how many all-terms candidates get the (record-reading) substring check
+PHRASE_CANDIDATES = 50
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_lock = threading.RLock()
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def record_text(rec: Dict) -> str:
+    return f"{rec.get('user','')}\n{rec.get('assistant','')}"
+
+
+class _Index:
+    def __init__(self):
+        # term -> (positions, term frequencies), both in insertion order
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_len = array("I")  # by log position; 0 for unparseable lines
+        self.n_docs = 0
+        self.total_len = 0
+        self.next_position = 0
+        self.consumed = 0  # bytes of the postings file already applied
+        self.snapshot_at = 0  # next_position covered by the snapshot
+
+    def apply(self, position: int, length: int, tf: Dict[str, int]) -> None:
+        if position < self.next_position:
+            return  # already indexed (e.g. by another process)
+        for term, count in tf.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("I"))
+            entry[0].append(position)
+            entry[1].append(count)
+        self.doc_len.extend([0] * (position - len(self.doc_len)))
+        self.doc_len.append(length)
+        self.n_docs += 1
+        self.total_len += length
+        self.next_position = position + 1
+
+
+_indexes: Dict[str, _Index] = {}  # memory directory -> its index
+
+
+def _load_snapshot(postings_size: int) -> Optional[_Index]:
+    try:
+        with open(session.memory_path(SNAPSHOT_NAME), "rb") as f:
+            snap = pickle.load(f)
+    except Exception:
+        return None
+    if isinstance(snap, _Index) and snap.consumed <= postings_size:
+        return snap
+    return None
+
+
+def _write_snapshot(index: _Index) -> None:
+    index.snapshot_at = index.next_position
+    snapshot_file = session.memory_path(SNAPSHOT_NAME)
+    tmp = snapshot_file + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, snapshot_file)
+
+
+def _load_new_postings(index: _Index, f) -> None:
+    f.seek(index.consumed)
+    for line in f:
+        if not line.endswith(b"\n"):
+            break  # torn or in-flight line; picked up by a later sync
+        index.consumed += len(line)
+        try:
+            position, length, tf = json.loads(line)
+        except ValueError:
+            continue
+        index.apply(position, length, tf)
+
+
+def sync() -> None:
+    """Apply postings written since the last call and index any new records.
+
+    Only the tail of the postings file and of the memory log is read, so
+    calling this after every save keeps the index current in O(new records).
+    """
+    memory_dir = session.memory_dir()
+    with _lock:
+        os.makedirs(memory_dir, exist_ok=True)
+        index = _indexes.setdefault(memory_dir, _Index())
+        with open(session.memory_path(POSTINGS_NAME), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                size = f.seek(0, os.SEEK_END)
+                if size < index.consumed:
+                    index = _indexes[memory_dir] = _Index()  # file was replaced underneath us
+                if index.consumed == 0:
+                    index = _indexes[memory_dir] = _load_snapshot(size) or index
+                _load_new_postings(index, f)
+                stored = memory_store.count()
+                if index.next_position > stored:
+                    # the memory log was reset: rebuild from scratch
+                    index = _indexes[memory_dir] = _Index()
+                    f.truncate(0)
+                    if os.path.exists(session.memory_path(SNAPSHOT_NAME)):
+                        os.remove(session.memory_path(SNAPSHOT_NAME))
+                if index.next_position >= stored:
+                    if index.next_position - index.snapshot_at >= SNAPSHOT_EVERY:
+                        _write_snapshot(index)
+                    return
+                f.seek(0, os.SEEK_END)
+                if index.consumed != f.tell():
+                    # a torn last line from a crash: drop it before appending
+                    f.truncate(index.consumed)
+                lines = []
+                for position, rec in memory_store.iter_indexed(index.next_position):
+                    terms = tokens(record_text(rec))
+                    tf = dict(Counter(terms))
+                    index.apply(position, len(terms), tf)
+                    lines.append(json.dumps([position, len(terms), tf], ensure_ascii=False).encode("utf-8") + b"\n")
+                data = b"".join(lines)
+                f.write(data)
+                f.flush()
+                index.consumed += len(data)
+                if index.next_position - index.snapshot_at >= SNAPSHOT_EVERY:
+                    _write_snapshot(index)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def search(query: str, top_k: int) -> List[Dict]:
+    """BM25 top-k over the index; exact phrase matches rank first."""
+    results = []
+    for position, _ in search_positions(query, top_k):
+        rec = memory_store.read_record(position)
+        if rec is not None:
+            results.append(rec)
+    return results
+
+
+def search_positions(query: str, top_k: int) -> List[Tuple[int, float]]:
+    """Like search, but returns (log position, BM25 score) pairs, best first."""
+    sync()
+    q_terms = list(dict.fromkeys(tokens(query)))
+    if not q_terms:
+        return []
+    with _lock:
+        index = _indexes[session.memory_dir()]
+        n_docs = index.n_docs
+        if n_docs == 0:
+            return []
+        avg_len = index.total_len / n_docs
+        scores: Dict[int, float] = {}
+        hits: Dict[int, int] = {}
+        for term in q_terms:
+            entry = index.postings.get(term)
+            if entry is None:
+                continue
+            positions, tfs = entry
+            df = len(positions)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for position, tf in zip(positions, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * index.doc_len[position] / avg_len)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                hits[position] = hits.get(position, 0) + 1
+
+    # substring boost: the normalized query appears verbatim in the record
+    phrase = " ".join(tokens(query))
+    full = [p for p, h in hits.items() if h == len(q_terms)]
+    boosted = set()
+    for position in heapq.nlargest(PHRASE_CANDIDATES, full, key=lambda p: scores[p]):
+        rec = memory_store.read_record(position)
+        if rec is not None and phrase in " ".join(tokens(record_text(rec))):
+            boosted.add(position)
+
+    top = heapq.nlargest(
+        max(1, top_k), scores, key=lambda p: (p in boosted, scores[p], p)
+    )
+    return [(position, scores[position]) for position in top]
@@ -0,0 +1,270 @@
+import json
+import os
+import sys
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+import session
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: the in-process lock is all we get
+    fcntl = None
+
+
+# file names inside the session's memory directory ("db" for the CLI)
+LOG_NAME = "memory.jsonl"
+# sidecar index: one little-endian uint64 byte offset per record in the log
+INDEX_NAME = "memory.idx"
+# pre-log format: a single JSON array rewritten on every save
+LEGACY_NAME = "memory.json"
+
+_OFFSET_SIZE = 8
+# records kept in-process for recent_records(); refreshed by append_record
+TAIL_CACHE_SIZE = 32
+_lock = threading.RLock()
+_recovered = set()  # memory directories already recovered by this process
+_tail_cache = {}  # memory directory -> (version(), last TAIL_CACHE_SIZE records)
+
+
+def log_file() -> str:
+    return session.memory_path(LOG_NAME)
+
+
+def index_file() -> str:
+    return session.memory_path(INDEX_NAME)
+
+
+def _offsets(data: bytes) -> array:
+    offsets = array("Q")
+    offsets.frombytes(data)
+    if offsets.itemsize != _OFFSET_SIZE:
+        raise RuntimeError("unsupported platform: array('Q') is not 64-bit")
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
+def _offset_bytes(offsets) -> bytes:
+    out = array("Q", offsets)
+    if sys.byteorder != "little":
+        out.byteswap()
+    return out.tobytes()
+
+
+def _parse(line: bytes) -> Optional[Dict]:
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+def _migrate_legacy(legacy_file: str, log_path: str, index_path: str) -> None:
+    try:
+        with open(legacy_file, "r") as f:
+            entries = json.load(f)
+    except Exception:
+        return
+    if not isinstance(entries, list):
+        return
+    tmp = log_path + ".tmp"
+    with open(tmp, "wb") as f:
+        for rec in entries:
+            if isinstance(rec, dict):
+                f.write(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, log_path)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    # keep the old file around, but never migrate it twice
+    os.replace(legacy_file, legacy_file + ".migrated")
+
+
+def _recover() -> None:
+    """Bring the log and its index into a consistent state.
+
+    Runs once per process and memory directory: migrates a legacy
+    memory.json, drops a torn last line left by a crash mid-append, and
+    re-indexes records the index missed.
+    """
+    memory_dir = session.memory_dir()
+    if memory_dir in _recovered:
+        return
+    log_path, index_path = log_file(), index_file()
+    legacy_file = session.memory_path(LEGACY_NAME)
+    os.makedirs(memory_dir, exist_ok=True)
+    if os.path.exists(legacy_file) and not os.path.exists(log_path):
+        _migrate_legacy(legacy_file, log_path, index_path)
+    if not os.path.exists(log_path):
+        open(log_path, "ab").close()
+
+    with open(log_path, "r+b") as log:
+        size = log.seek(0, os.SEEK_END)
+        if size > 0:
+            log.seek(size - 1)
+            if log.read(1) != b"\n":
+                # torn write: cut back to the end of the last complete line
+                pos = size
+                chunk = 4096
+                end = 0
+                while pos > 0:
+                    start = max(0, pos - chunk)
+                    log.seek(start)
+                    nl = log.read(pos - start).rfind(b"\n")
+                    if nl != -1:
+                        end = start + nl + 1
+                        break
+                    pos = start
+                log.truncate(end)
+                size = end
+
+        index = b""
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                index = f.read()
+        offsets = _offsets(index[: len(index) - len(index) % _OFFSET_SIZE])
+        while offsets and offsets[-1] >= size:
+            offsets.pop()
+
+        # re-index whatever follows the last indexed record
+        scan_from = 0
+        if offsets:
+            log.seek(offsets[-1])
+            log.readline()
+            scan_from = log.tell()
+        log.seek(scan_from)
+        while True:
+            pos = log.tell()
+            line = log.readline()
+            if not line:
+                break
+            offsets.append(pos)
+
+    tmp = index_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_offset_bytes(offsets))
+    os.replace(tmp, index_path)
+    _recovered.add(memory_dir)
+
+
+def _read_offsets(start: int, stop: int) -> array:
+    with open(index_file(), "rb") as f:
+        f.seek(start * _OFFSET_SIZE)
+        return _offsets(f.read((stop - start) * _OFFSET_SIZE))
+
+
+def count() -> int:
+    with _lock:
+        _recover()
+        return os.path.getsize(index_file()) // _OFFSET_SIZE
+
+
+def iter_indexed(start: int = 0) -> Iterator[Tuple[int, Dict]]:
+    """Yield (log position, record) pairs from a 0-based position onwards.
+
+    Reads lazily from the offset of `start`, so nothing before it is parsed.
+    """
+    with _lock:
+        _recover()
+        offsets = _read_offsets(start, start + 1) if start > 0 else array("Q", [0])
+    if not offsets:
+        return
+    with open(log_file(), "rb") as f:
+        f.seek(offsets[0])
+        for position, line in enumerate(f, start):
+            if not line.endswith(b"\n"):
+                break  # an append still in flight
+            rec = _parse(line)
+            if rec is not None:
+                yield position, rec
+
+
+def iter_records(start: int = 0) -> Iterator[Dict]:
+    """Yield stored records oldest first without loading the whole log."""
+    for _, rec in iter_indexed(start):
+        yield rec
+
+
+def read_record(position: int) -> Optional[Dict]:
+    """Return the record at a 0-based log position (insertion order)."""
+    with _lock:
+        _recover()
+        offsets = _read_offsets(position, position + 1)
+    if not offsets:
+        return None
+    with open(log_file(), "rb") as f:
+        f.seek(offsets[0])
+        return _parse(f.readline())
+
+
+def tail_records(n: int) -> List[Dict]:
+    """Return the last n records, oldest first, reading only their bytes."""
+    with _lock:
+        total = count()
+        start = max(0, total - n)
+        offsets = _read_offsets(start, total)
+    if not offsets:
+        return []
+    with open(log_file(), "rb") as f:
+        f.seek(offsets[0])
+        lines = f.read().splitlines()[: len(offsets)]
+    return [rec for rec in map(_parse, lines) if rec is not None]
+
+
+def last_record() -> Optional[Dict]:
+    tail = recent_records(1)
+    return tail[0] if tail else None
+
+
+def version() -> Tuple[int, int]:
+    """(mtime_ns, size) of the log; changes whenever a record is appended."""
+    with _lock:
+        _recover()
+        st = os.stat(log_file())
+        return st.st_mtime_ns, st.st_size
+
+
+def recent_records(n: int) -> List[Dict]:
+    """Like tail_records, but served from memory while the log is unchanged."""
+    if n > TAIL_CACHE_SIZE:
+        return tail_records(n)
+    with _lock:
+        key = version()
+        cached = _tail_cache.get(session.memory_dir())
+        if cached is None or cached[0] != key:
+            cached = _tail_cache[session.memory_dir()] = (key, tail_records(TAIL_CACHE_SIZE))
+        records = cached[1]
+    return records[-n:] if n > 0 else []
+
+
+def append_record(user: str, assistant: str) -> Dict:
+    """Append one Q&A record in O(1) and return it with its assigned id."""
+    with _lock:
+        _recover()
+        with open(log_file(), "ab") as log, open(index_file(), "ab") as index:
+            if fcntl is not None:
+                fcntl.flock(log.fileno(), fcntl.LOCK_EX)
+            try:
+                # also brings the tail cache up to date with the log
+                last = last_record()
+                next_id = (last.get("id", 0) + 1) if last else 1
+                record = {"id": next_id, "user": user, "assistant": assistant}
+                offset = log.seek(0, os.SEEK_END)
+                log.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                log.flush()
+                # the index is written second; _recover rebuilds it if we die in between
+                index.write(_offset_bytes([offset]))
+                index.flush()
+                _refresh_tail_cache(record)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(log.fileno(), fcntl.LOCK_UN)
+        return record
+
+
+def _refresh_tail_cache(appended: Dict) -> None:
+    memory_dir = session.memory_dir()
+    records = (_tail_cache[memory_dir][1] + [appended])[-TAIL_CACHE_SIZE:]
+    _tail_cache[memory_dir] = (version(), records)
@@ -0,0 +1,172 @@
+import os
+import threading
+import zlib
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # semantic search is optional; search_memory stays lexical
+    np = None
+
+from config import MEMORY_SEMANTIC, MEMORY_SEMANTIC_MIN_SCORE
+from functions import memory_store
+from functions.memory_store import fcntl  # None off POSIX
+from functions.memory_index import record_text, tokens
+import session
+
+
+# row i embeds the record at log position i; the .npy header's row count is
+# rewritten in place after each append (numpy pads it so its size never changes)
+VECTORS_NAME = "memory.vectors.npy"
+EMBED_DIM = 128
+# character n-grams let "sorting" meet "quicksort" even without a shared word
+NGRAM = 3
+NGRAM_WEIGHT = 0.5
+SYNC_BLOCK_ROWS = 4096
+
+_lock = threading.RLock()
+_matrices = {}  # vectors file -> (file size, memmap) as last opened
+
+
+def vectors_file() -> str:
+    return session.memory_path(VECTORS_NAME)
+
+
+def available() -> bool:
+    return np is not None and MEMORY_SEMANTIC
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple[Tuple[int, float], ...]:
+    """(dimension, signed weight) for a word and its character n-grams."""
+    padded = f"#{word}#"
+    features = [(word, 1.0)] + [
+        (padded[i:i + NGRAM], NGRAM_WEIGHT) for i in range(len(padded) - NGRAM + 1)
+    ]
+    out = []
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        # the top bit picks a sign so collisions cancel out on average
+        out.append((h % EMBED_DIM, -weight if h & 0x80000000 else weight))
+    return tuple(out)
+
+
+def embed_many(texts: List[str]):
+    """Hashed word + character n-gram vectors, L2-normalized (float32, len(texts) x EMBED_DIM)."""
+    cells, weights = [], []
+    for row, text in enumerate(texts):
+        base = row * EMBED_DIM
+        for word in tokens(text):
+            for dim, weight in _word_features(word):
+                cells.append(base + dim)
+                weights.append(weight)
+    flat = np.bincount(cells, weights, minlength=len(texts) * EMBED_DIM) if cells else np.zeros(len(texts) * EMBED_DIM)
+    vectors = flat.reshape(len(texts), EMBED_DIM).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def embed(text: str):
+    return embed_many([text])[0]
+
+
+def _header(f) -> Tuple[int, int]:
+    """Return (row count, data offset) of an open vectors file."""
+    f.seek(0)
+    np.lib.format.read_magic(f)
+    shape, _, _ = np.lib.format.read_array_header_1_0(f)
+    return shape[0], f.tell()
+
+
+def _write_header(f, rows: int) -> None:
+    f.seek(0)
+    np.lib.format.write_array_header_1_0(
+        f, {"descr": "<f4", "fortran_order": False, "shape": (rows, EMBED_DIM)}
+    )
+
+
+def sync() -> None:
+    """Embed records appended to the memory log since the last sync."""
+    if not available():
+        return
+    with _lock:
+        os.makedirs(session.memory_dir(), exist_ok=True)
+        # not "a+b": appends would ignore the seek back to the header
+        with os.fdopen(os.open(vectors_file(), os.O_RDWR | os.O_CREAT, 0o644), "r+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if f.seek(0, os.SEEK_END) == 0:
+                    _write_header(f, 0)
+                rows, data_start = _header(f)
+                stored = memory_store.count()
+                if rows > stored:
+                    # the memory log was reset: start over
+                    f.truncate(0)
+                    _write_header(f, 0)
+                    rows, data_start = _header(f)
+                if rows >= stored:
+                    return
+                f.seek(data_start + rows * EMBED_DIM * 4)
+                f.truncate()
+                # embedded in fixed-size blocks so a backfill never holds the whole matrix;
+                # unparseable log lines keep an empty text, i.e. an all-zero row that never matches
+                texts, block_start = [], rows
+                for position, rec in memory_store.iter_indexed(rows):
+                    if position >= stored:
+                        break
+                    texts.extend([""] * (position - block_start - len(texts)))
+                    texts.append(record_text(rec))
+                    if len(texts) >= SYNC_BLOCK_ROWS:
+                        f.write(embed_many(texts).tobytes())
+                        block_start += len(texts)
+                        texts = []
+                texts.extend([""] * (stored - block_start - len(texts)))
+                if texts:
+                    f.write(embed_many(texts).tobytes())
+                f.flush()
+                # rows first, header last: a crash in between only loses this append
+                _write_header(f, stored)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _open_matrix():
+    path = vectors_file()
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+    cached = _matrices.get(path)
+    if cached is None or cached[0] != size:
+        cached = _matrices[path] = (size, np.load(path, mmap_mode="r"))
+    return cached[1]
+
+
+def search(query: str, top_k: int) -> List[Tuple[int, float]]:
+    """Cosine top-k as (log position, score), best first.
+
+    One matrix-vector product over the memory-mapped embeddings plus
+    argpartition; only the k winners are sorted, and no record is parsed.
+    Scores under MEMORY_SEMANTIC_MIN_SCORE are dropped: hashed features
+    collide, so an unrelated entry still scores well above zero.
+    """
+    if not available():
+        return []
+    sync()
+    q = embed(query)
+    if not q.any():
+        return []
+    with _lock:
+        matrix = _open_matrix()
+        if matrix is None or len(matrix) == 0:
+            return []
+        scores = matrix @ q
+    k = min(max(1, top_k), len(scores))
+    top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+    top = top[np.argsort(scores[top])[::-1]]
+    return [(int(p), float(scores[p])) for p in top if scores[p] >= MEMORY_SEMANTIC_MIN_SCORE]
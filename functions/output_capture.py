@@ -0,0 +1,96 @@
+import sys
+import threading
+from config import RUN_OUTPUT_HEAD, RUN_OUTPUT_TAIL, RUN_OUTPUT_HARD_LIMIT
+
+_CHUNK = 65536
+_echo_lock = threading.Lock()
+
+
+class BoundedBuffer:
+    """Keeps the first `head` and last `tail` bytes of a stream and counts the rest."""
+
+    def __init__(self, head=RUN_OUTPUT_HEAD, tail=RUN_OUTPUT_TAIL):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def feed(self, data):
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            # trim lazily so a stream of small writes stays amortized O(1)
+            if len(self.tail) > 2 * self.tail_limit:
+                del self.tail[: len(self.tail) - self.tail_limit]
+
+    @property
+    def dropped(self):
+        return self.total - len(self.head) - min(len(self.tail), self.tail_limit)
+
+    def text(self):
+        tail = bytes(self.tail[-self.tail_limit:]) if self.tail_limit else b""
+        head = bytes(self.head).decode("utf-8", errors="replace")
+        tail = tail.decode("utf-8", errors="replace")
+        if self.dropped > 0:
+            return f"{head}\n[... {self.dropped} bytes omitted ...]\n{tail}"
+        return head + tail
+
+
+def _echo(prefix):
+    """Line-buffered forwarder of a child's output to the terminal."""
+    pending = bytearray()
+
+    def write(data):
+        pending.extend(data)
+        *lines, rest = pending.split(b"\n")
+        if len(rest) > _CHUNK:
+            lines.append(bytes(rest))  # a huge unterminated line: show it now
+            rest = b""
+        pending[:] = rest
+        if lines:
+            with _echo_lock:
+                for line in lines:
+                    sys.stdout.write(f"   {prefix} {line.decode('utf-8', errors='replace')}\n")
+                sys.stdout.flush()
+
+    return write
+
+
+def capture(stdout_file, stderr_file, kill, echo=False):
+    """Read a child's stdout/stderr pipes to EOF with bounded memory.
+
+    Calls kill() once if the combined output passes RUN_OUTPUT_HARD_LIMIT and
+    keeps draining (and discarding) until the pipes close. Returns
+    (stdout buffer, stderr buffer, whether the limit was hit).
+    """
+    buffers = (BoundedBuffer(), BoundedBuffer())
+    total = [0]
+    killed = [False]
+    lock = threading.Lock()
+
+    def pump(f, buf, forward):
+        with f:
+            for block in iter(lambda: f.read1(_CHUNK) if hasattr(f, "read1") else f.read(_CHUNK), b""):
+                buf.feed(block)
+                if forward is not None:
+                    forward(block)
+                with lock:
+                    total[0] += len(block)
+                    over = total[0] > RUN_OUTPUT_HARD_LIMIT and not killed[0]
+                    if over:
+                        killed[0] = True
+                if over:
+                    kill()
+
+    err_thread = threading.Thread(
+        target=pump, args=(stderr_file, buffers[1], _echo("!") if echo else None), daemon=True
+    )
+    err_thread.start()
+    pump(stdout_file, buffers[0], _echo("|") if echo else None)
+    err_thread.join()
+    return buffers[0], buffers[1], killed[0]
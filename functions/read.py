@@ -1,9 +1,114 @@
+import mmap
 import os
-from config import MAX_CHARS
+import threading
+from array import array
+from collections import OrderedDict
+from config import MAX_CHARS, READ_MMAP_THRESHOLD
 from google.genai import types
+import tracing
 
+# bytes sniffed for NUL to tell binary files apart without decoding them
+BINARY_SNIFF_BYTES = 8192
+LINE_INDEX_CACHE_SIZE = 8
 
-def read(working_directory: str, file_path: str):
+_line_index_lock = threading.Lock()
+_line_index_cache = OrderedDict()  # (path, mtime_ns, size) -> array of line start offsets
+
+
+def _line_index(key, buf):
+    with _line_index_lock:
+        starts = _line_index_cache.get(key)
+        if starts is not None:
+            _line_index_cache.move_to_end(key)
+            return starts
+    starts = array("Q", [0])
+    find = buf.find
+    pos = find(b"\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find(b"\n", pos + 1)
+    with _line_index_lock:
+        _line_index_cache[key] = starts
+        while len(_line_index_cache) > LINE_INDEX_CACHE_SIZE:
+            _line_index_cache.popitem(last=False)
+    return starts
+
+
+def _as_int(value, name):
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'"{name}" must be an integer')
+    if number < 0:
+        raise ValueError(f'"{name}" must not be negative')
+    return number
+
+
+def _fitting_lines(buf, starts, first, last, stop):
+    """Decode lines first..last, stopping after the last whole line that keeps the
+    text within MAX_CHARS; returns (text, last line included)."""
+    begin = starts[first - 1]
+    if stop - begin <= MAX_CHARS:  # never more characters than bytes
+        return buf[begin:stop].decode("utf-8", errors="replace"), last
+    pieces = []
+    used = 0
+    for line in range(first, last + 1):
+        end = starts[line] if line < last else stop
+        piece = buf[starts[line - 1]:end].decode("utf-8", errors="replace")
+        if used + len(piece) > MAX_CHARS:
+            if line == first:
+                # a single line longer than the limit: show its start
+                return piece[:MAX_CHARS], first - 1
+            return "".join(pieces), line - 1
+        pieces.append(piece)
+        used += len(piece)
+    return "".join(pieces), last
+
+
+def _read_range(buf, key, file_path, size, offset, length, start_line, end_line):
+    if start_line is not None or end_line is not None:
+        starts = _line_index(key, buf)
+        # a trailing newline does not start another line
+        total = len(starts) - (1 if size and starts[-1] == size else 0)
+        first = max(1, start_line or 1)
+        last = min(total, end_line if end_line is not None else first + 99)
+        if first > total or last < first:
+            return f'Error: lines {first}-{last} out of range; "{file_path}" has {total} lines'
+        stop = starts[last] if last < len(starts) else size
+        text, shown = _fitting_lines(buf, starts, first, last, stop)
+        if shown == last:
+            return f"[lines {first}-{last} of {total}]\n" + text
+        if shown < first:
+            line_bytes = (starts[first] if first < len(starts) else size) - starts[first - 1]
+            return (
+                f"[line {first} of {total}, first {MAX_CHARS} characters]\n{text}"
+                f'[...line {first} is {line_bytes} bytes; pass offset={starts[first - 1] + len(text.encode("utf-8"))} '
+                f"and length to read the rest of it]"
+            )
+        return (
+            f"[lines {first}-{shown} of {total}]\n{text}"
+            f"[...lines {first}-{last} of \"{file_path}\" exceed {MAX_CHARS} characters; "
+            f"pass start_line={shown + 1} to continue]"
+        )
+
+    offset = offset or 0
+    length = MAX_CHARS if length is None else min(length, MAX_CHARS)
+    if offset >= size:
+        return f'Error: offset {offset} is past the end of "{file_path}" ({size} bytes)'
+    stop = min(size, offset + length)
+    text = buf[offset:stop].decode("utf-8", errors="replace")
+    return f"[bytes {offset}-{stop} of {size}]\n" + text
+
+
+def _count_read(span, text, file_size):
+    returned = len(text.encode("utf-8", errors="replace"))
+    span.tag(bytes=returned, file_size=file_size)
+    tracing.count("bytes", returned, "read")
+
+
+def read(working_directory: str, file_path: str, offset=None, length=None, start_line=None, end_line=None):
     abs_working_dir = os.path.abspath(working_directory)
     abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
     if not abs_file_path.startswith(abs_working_dir):
@@ -12,18 +117,49 @@ def read(working_directory: str, file_path: str):
         return f'Error: "{file_path}" is not a file'
 
     try:
-        with open(abs_file_path, 'r') as file:
-            file_content_string = file.read(MAX_CHARS)
-            if len(file_content_string) >= MAX_CHARS:
-                file_content_string += (f'[...File "{file_path}" truncated at {MAX_CHARS} characters]')
-        return file_content_string
+        offset = _as_int(offset, "offset")
+        length = _as_int(length, "length")
+        start_line = _as_int(start_line, "start_line")
+        end_line = _as_int(end_line, "end_line")
+    except ValueError as e:
+        return f"Error: {e}"
+
+    try:
+        with tracing.span("io.read", file=file_path) as span, open(abs_file_path, 'rb') as file:
+            st = os.fstat(file.fileno())
+            size = st.st_size
+            if b"\0" in file.read(BINARY_SNIFF_BYTES):
+                return f'Error: "{file_path}" looks like a binary file ({size} bytes)'
+
+            ranged = any(v is not None for v in (offset, length, start_line, end_line))
+            if not ranged:
+                with open(abs_file_path, 'r') as text_file:
+                    file_content_string = text_file.read(MAX_CHARS)
+                    if len(file_content_string) >= MAX_CHARS:
+                        file_content_string += (
+                            f'[...File "{file_path}" truncated at {MAX_CHARS} characters; '
+                            f'pass start_line/end_line or offset/length to read further]'
+                        )
+                _count_read(span, file_content_string, size)
+                return file_content_string
+
+            key = (abs_file_path, st.st_mtime_ns, size)
+            span.tag(mmap=size >= READ_MMAP_THRESHOLD)
+            if size >= READ_MMAP_THRESHOLD:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    result = _read_range(buf, key, file_path, size, offset, length, start_line, end_line)
+            else:
+                file.seek(0)
+                result = _read_range(file.read(), key, file_path, size, offset, length, start_line, end_line)
+            _count_read(span, result, size)
+            return result
     except Exception as e:
         return f'Exception reading file: {e}'
 
 
 schema_read = types.FunctionDeclaration(
     name="read",
-    description="Reads the content of a file within the working directory (truncated by MAX_CHARS).",
+    description="Reads the content of a file within the working directory (truncated by MAX_CHARS). Pass start_line/end_line or offset/length to read a later part of a large file.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -31,8 +167,22 @@ schema_read = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="Path to the file, relative to the working directory.",
             ),
+            "start_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="First line to return (1-based). Defaults to 1 when end_line is given.",
+            ),
+            "end_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Last line to return (inclusive). Defaults to start_line + 99.",
+            ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Byte offset to start reading from (ignored when a line range is given).",
+            ),
+            "length": types.Schema(
+                type=types.Type.INTEGER,
+                description="Number of bytes to read from offset (at most MAX_CHARS).",
+            ),
         },
     ),
 )
-
-
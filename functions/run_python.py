@@ -1,10 +1,38 @@
 import os
 import subprocess
-from config import MAX_RUN_ARGS, MAX_ARG_LEN
+import threading
+from config import MAX_RUN_ARGS, MAX_ARG_LEN, RUN_PYTHON_WARM
+from functions import output_capture, warm_python
 from google.genai import types
+import tracing
 
 
-def run_python(working_directory: str, file_path: str, args=[]):
+def _run_cold(final_args, cwd, timeout, echo=False):
+    """Run final_args in a fresh process, capturing output with bounded memory.
+
+    Returns (returncode, stdout buffer, stderr buffer, output limit hit) and
+    raises TimeoutExpired like subprocess.run.
+    """
+    proc = subprocess.Popen(final_args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, on_timeout)
+    watchdog.start()
+    try:
+        stdout, stderr, limit_hit = output_capture.capture(proc.stdout, proc.stderr, proc.kill, echo)
+        returncode = proc.wait()
+    finally:
+        watchdog.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(final_args, timeout)
+    return returncode, stdout, stderr, limit_hit
+
+
+def run_python(working_directory: str, file_path: str, args=[], echo=False):
     abs_working_dir = os.path.abspath(working_directory)
     abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
     if not abs_file_path.startswith(abs_working_dir):
@@ -25,18 +53,20 @@ def run_python(working_directory: str, file_path: str, args=[]):
                 return f"Error: arg exceeds MAX_ARG_LEN ({MAX_ARG_LEN})"
         final_args=['python3', file_path]
         final_args.extend(args)
-        output = subprocess.run(
-            final_args,
-            cwd=abs_working_dir,
-            timeout=30,
-            capture_output=True,
-            text=True
-        )
-        final_string = f"STDOUT:{output.stdout}\nSTDERR:{output.stderr}\n"
-        if output.stdout == "" and output.stderr == "":
+        # warm mode forks the script from a pre-started interpreter instead
+        warm = RUN_PYTHON_WARM and warm_python.available()
+        runner = warm_python.run if warm else _run_cold
+        with tracing.span("subprocess", file=file_path, warm=warm) as span:
+            returncode, stdout, stderr, limit_hit = runner(final_args, abs_working_dir, 30, echo)
+            span.tag(returncode=returncode, output_bytes=stdout.total + stderr.total)
+        tracing.count("bytes", stdout.total + stderr.total, "subprocess_output")
+        final_string = f"STDOUT:{stdout.text()}\nSTDERR:{stderr.text()}\n"
+        if stdout.total == 0 and stderr.total == 0:
             final_string = "No output produced.\n"
-        if output.returncode != 0:
-            final_string += f"Process exited with code {output.returncode}"
+        if limit_hit:
+            final_string += f"Output limit exceeded: process killed after {stdout.total + stderr.total} bytes of output\n"
+        if returncode != 0:
+            final_string += f"Process exited with code {returncode}"
         return final_string
     except Exception as e:
         return f'Error: "{file_path}" ran with error: {e}'
@@ -0,0 +1,169 @@
+import contextvars
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from config import RUN_TESTS_MAX_FILES, RUN_TESTS_TIMEOUT_S, RUN_TESTS_WORKERS, RUN_TESTS_EXCERPT_CHARS, RUN_TESTS_MAX_CHARS, RUN_PYTHON_WARM
+from functions import warm_python
+from functions.get_files_info import SKIP_DIRS
+from functions.run_python import _run_cold
+from google.genai import types
+import session
+import tracing
+
+# seconds each file took last time, by sandbox-relative path
+DURATIONS_NAME = "test_durations.json"
+_durations_lock = threading.Lock()
+
+
+def _discover(abs_working_dir, abs_directory, patterns):
+    found = []
+    for root, dirs, files in os.walk(abs_directory):  # does not follow symlinked directories
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            # a symlinked file could point outside the sandbox
+            if name.endswith(".py") and any(fnmatch(name, p) for p in patterns) and not os.path.islink(path):
+                found.append(os.path.relpath(path, abs_working_dir))
+    return found
+
+
+def _load_durations():
+    try:
+        with open(session.memory_path(DURATIONS_NAME), encoding="utf-8") as f:
+            durations = json.load(f)
+        return durations if isinstance(durations, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_durations(measured):
+    path = session.memory_path(DURATIONS_NAME)
+    with _durations_lock:
+        durations = _load_durations()
+        durations.update(measured)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(durations, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the history only orders the next run
+
+
+def _excerpt(stdout, stderr):
+    # tracebacks and assertion messages end up at the end of stderr
+    text = (stderr.text() if stderr.total else stdout.text()).strip()
+    if len(text) > RUN_TESTS_EXCERPT_CHARS:
+        text = "[...]" + text[-RUN_TESTS_EXCERPT_CHARS:]
+    return "\n".join("    " + line for line in text.splitlines())
+
+
+def _run_one(rel_path, abs_working_dir, timeout, use_pytest, echo):
+    """Returns (status, seconds, note, excerpt); status is passed, failed, timeout or error."""
+    final_args = ["python3", "-m", "pytest", "-q", rel_path] if use_pytest else ["python3", rel_path]
+    # the warm pool only runs plain scripts
+    warm = RUN_PYTHON_WARM and not use_pytest and warm_python.available()
+    runner = warm_python.run if warm else _run_cold
+    started = time.perf_counter()
+    with tracing.span("subprocess", file=rel_path, warm=warm) as span:
+        try:
+            returncode, stdout, stderr, limit_hit = runner(final_args, abs_working_dir, timeout, echo)
+        except subprocess.TimeoutExpired:
+            return "timeout", time.perf_counter() - started, f"killed after {timeout}s", ""
+        except Exception as e:
+            return "error", time.perf_counter() - started, str(e), ""
+        span.tag(returncode=returncode, output_bytes=stdout.total + stderr.total)
+    tracing.count("bytes", stdout.total + stderr.total, "subprocess_output")
+    seconds = time.perf_counter() - started
+    if returncode == 0 and not limit_hit:
+        return "passed", seconds, "", ""
+    note = "output limit exceeded, killed" if limit_hit else f"exit {returncode}"
+    return "failed", seconds, note, _excerpt(stdout, stderr)
+
+
+def run_tests(working_directory: str, directory=".", pattern="test_*.py", pytest=False, timeout=None, slowest_first=True, echo=False):
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_directory = os.path.abspath(os.path.join(working_directory, directory))
+    if not abs_directory.startswith(abs_working_dir):
+        return f'Error: "{directory}" is not in the working directory'
+    if not os.path.isdir(abs_directory):
+        return f'Error: "{directory}" is not a directory'
+    try:
+        timeout = RUN_TESTS_TIMEOUT_S if timeout is None else max(1, min(int(timeout), RUN_TESTS_TIMEOUT_S))
+    except (TypeError, ValueError):
+        return 'Error: "timeout" must be an integer'
+
+    patterns = [p.strip() for p in (pattern or "").split(",") if p.strip()] or ["*.py"]
+    files = _discover(abs_working_dir, abs_directory, patterns)
+    if not files:
+        return f'No Python files matching "{",".join(patterns)}" in "{directory}"'
+    not_run = len(files) - RUN_TESTS_MAX_FILES
+    files = files[:RUN_TESTS_MAX_FILES]
+    if slowest_first:
+        # longest first keeps one slow file from starting last; unknown files count as slow
+        history = _load_durations()
+        files.sort(key=lambda f: -history.get(f, float("inf")))
+
+    workers = min(len(files), RUN_TESTS_WORKERS or os.cpu_count() or 1)
+    started = time.perf_counter()
+    with tracing.span("tests", files=len(files), workers=workers) as span, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _run_one, f, abs_working_dir, timeout, bool(pytest), echo)
+            for f in files
+        ]
+        results = [future.result() for future in futures]
+        span.tag(failed=sum(1 for r in results if r[0] != "passed"))
+    wall = time.perf_counter() - started
+    _save_durations({f: round(r[1], 3) for f, r in zip(files, results) if r[0] != "error"})
+
+    counts = {}
+    for status, *_ in results:
+        counts[status] = counts.get(status, 0) + 1
+    summary = ", ".join(f"{counts[s]} {s}" for s in ("passed", "failed", "timeout", "error") if s in counts)
+    lines = [
+        f"{len(files)} files: {summary} ({wall:.2f}s wall, "
+        f"{sum(r[1] for r in results):.2f}s total on {workers} workers)"
+    ]
+    if not_run > 0:
+        lines.append(f"[{not_run} more matching files not run (RUN_TESTS_MAX_FILES={RUN_TESTS_MAX_FILES}); narrow directory or pattern]")
+    # failures first, in path order, then the passing files on one line
+    order = sorted(range(len(files)), key=lambda i: files[i])
+    for i in order:
+        status, seconds, note, excerpt = results[i]
+        if status != "passed":
+            lines.append(f"{status.upper()} {files[i]} ({seconds:.2f}s, {note})")
+            if excerpt:
+                lines.append(excerpt)
+    passed = [files[i] for i in order if results[i][0] == "passed"]
+    if passed:
+        lines.append("passed: " + ", ".join(passed))
+
+    text = "\n".join(lines) + "\n"
+    if len(text) > RUN_TESTS_MAX_CHARS:
+        text = text[:RUN_TESTS_MAX_CHARS] + f"\n[...summary truncated at {RUN_TESTS_MAX_CHARS} characters]\n"
+    return text
+
+
+schema_run_tests = types.FunctionDeclaration(
+    name="run_tests",
+    description=(
+        "Finds Python test files or scripts in the working directory by glob and runs them in parallel "
+        "(each in its own process with a timeout), returning one pass/fail summary with failure excerpts. "
+        "Prefer this over several run_python calls to check a project."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "directory": types.Schema(type=types.Type.STRING, description="Directory to search recursively (default: .)"),
+            "pattern": types.Schema(type=types.Type.STRING, description='File name glob(s), comma-separated (default: "test_*.py")'),
+            "pytest": types.Schema(type=types.Type.BOOLEAN, description="Run each file with python3 -m pytest instead of as a script"),
+            "timeout": types.Schema(type=types.Type.INTEGER, description=f"Seconds per file (at most {RUN_TESTS_TIMEOUT_S})"),
+            "slowest_first": types.Schema(type=types.Type.BOOLEAN, description="Start the files that took longest last time first (default: true)"),
+        },
+    ),
+)
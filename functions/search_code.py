@@ -0,0 +1,93 @@
+import os
+import re
+from fnmatch import fnmatch
+from config import SEARCH_CODE_MAX_RESULTS, MAX_CHARS
+from functions import code_index
+from google.genai import types
+import tracing
+
+# longest line shown per match
+SNIPPET_CHARS = 200
+
+
+def search_code(working_directory: str, query: str, regex=False, ignore_case=False, pattern=None, max_results=None):
+    if not query:
+        return 'Error: "query" must not be empty'
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        compiled = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        return f"Error: invalid regex: {e}"
+    try:
+        limit = SEARCH_CODE_MAX_RESULTS if max_results is None else max(1, min(int(max_results), SEARCH_CODE_MAX_RESULTS))
+    except (TypeError, ValueError):
+        return 'Error: "max_results" must be an integer'
+
+    literals = code_index.required_literals(query) if regex else [query]
+    if ignore_case:
+        # the index folds ASCII case only
+        literals = [literal for literal in literals if literal.isascii()]
+    patterns = [p.strip() for p in (pattern or "").split(",") if p.strip()]
+
+    with tracing.span("code.search", regex=bool(regex)) as span:
+        index = code_index.refresh(working_directory)
+        paths = code_index.candidates(index, literals)
+        if patterns:
+            paths = [p for p in paths if any(fnmatch(os.path.basename(p), g) or fnmatch(p, g) for g in patterns)]
+        span.tag(indexed_files=len(index.files), candidates=len(paths))
+
+        lines = []
+        files_matched = 0
+        more = False
+        for rel in paths:
+            if more:
+                break
+            try:
+                with open(os.path.join(index.root, rel), "r", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            if not compiled.search(text):
+                continue  # a trigram false positive
+            files_matched += 1
+            for lineno, line in enumerate(text.splitlines(), 1):
+                if compiled.search(line):
+                    if len(lines) == limit:
+                        # one match past the cap is enough to say there are more
+                        more = True
+                        break
+                    snippet = line.strip()
+                    if len(snippet) > SNIPPET_CHARS:
+                        snippet = snippet[:SNIPPET_CHARS] + "..."
+                    lines.append(f"{rel}:{lineno}: {snippet}")
+        span.tag(matches=len(lines), truncated=more)
+
+    if not lines:
+        return f'No matches for "{query}" in {len(index.files)} indexed files.'
+    out = "\n".join(lines)
+    if len(out) > MAX_CHARS * 4:
+        out = out[: MAX_CHARS * 4] + "\n[...snippets truncated]"
+    if more:
+        footer = f"[first {len(lines)} matching lines shown; there are more, narrow the query or pass pattern]"
+    else:
+        footer = f"[{len(lines)} matching lines in {files_matched} files]"
+    return out + "\n" + footer
+
+
+schema_search_code = types.FunctionDeclaration(
+    name="search_code",
+    description=(
+        "Searches the contents of all files in the working directory (trigram-indexed) and returns "
+        "matching file:line snippets. Use it to find where something is defined or used instead of reading files one by one."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "query": types.Schema(type=types.Type.STRING, description="Text to find, or a Python regex when regex=true"),
+            "regex": types.Schema(type=types.Type.BOOLEAN, description="Treat query as a regular expression"),
+            "ignore_case": types.Schema(type=types.Type.BOOLEAN, description="Case-insensitive match"),
+            "pattern": types.Schema(type=types.Type.STRING, description="Only search files matching these globs, e.g. *.py,*.txt"),
+            "max_results": types.Schema(type=types.Type.INTEGER, description="Maximum matching lines to return"),
+        },
+    ),
+)
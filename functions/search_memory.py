@@ -1,100 +1,67 @@
+import heapq
 import json
-import os
 from typing import List, Dict
 from google.genai import types
+from config import MEMORY_SEMANTIC_WEIGHT
+from functions import memory_index, memory_store, memory_vectors
+import tracing
 
-
-MEMORY_FILE = "db/memory.json"
-
-
-def _read_memory() -> List[Dict]:
-    if not os.path.exists(MEMORY_FILE):
-        return []
-    try:
-        with open(MEMORY_FILE, "r") as f:
-            data = json.load(f)
-            return data if isinstance(data, list) else []
-    except Exception:
-        return []
-
-
-def _write_memory(entries: List[Dict]) -> None:
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    tmp = MEMORY_FILE + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, MEMORY_FILE)
+# reciprocal rank fusion constant, and how deep each ranking is read for it
+RRF_K = 60
+FUSION_DEPTH = 4
 
 
 def save_qa(user: str, assistant: str) -> str:
-    entries = _read_memory()
-    next_id = (entries[-1]["id"] + 1) if entries else 1
-    record = {"id": next_id, "user": user, "assistant": assistant}
-    entries.append(record)
     try:
-        _write_memory(entries)
+        with tracing.span("memory.save"):
+            memory_store.append_record(user, assistant)
+            memory_index.sync()
+            memory_vectors.sync()
         return "ok"
     except Exception as e:
         return f"error: {e}"
 
 
-def _tokens(text: str) -> List[str]:
-    out = []
-    buf = []
-    for ch in text.lower():
-        if ch.isalnum():
-            buf.append(ch)
-        else:
-            if buf:
-                out.append("".join(buf))
-                buf = []
-    if buf:
-        out.append("".join(buf))
-    return out
-
-
-def _score(query: str, text: str) -> float:
-    q = " ".join(_tokens(query))
-    t = " ".join(_tokens(text))
-    if not q or not t:
-        return 0.0
-    # Boost substring matches
-    if q in t:
-        return 2.0
-    qset = set(q.split())
-    tset = set(t.split())
-    inter = len(qset & tset)
-    if inter == 0:
-        return 0.0
-    return inter / max(1, len(qset))
+def _fused_search(query: str, top_k: int) -> List[Dict]:
+    """Merge BM25 and embedding rankings by weighted reciprocal rank."""
+    depth = max(1, top_k) * FUSION_DEPTH
+    scores: Dict[int, float] = {}
+    for weight, ranking in (
+        (1 - MEMORY_SEMANTIC_WEIGHT, memory_index.search_positions(query, depth)),
+        (MEMORY_SEMANTIC_WEIGHT, memory_vectors.search(query, depth)),
+    ):
+        for rank, (position, _) in enumerate(ranking):
+            scores[position] = scores.get(position, 0.0) + weight / (RRF_K + rank + 1)
+    results = []
+    for position in heapq.nlargest(max(1, top_k), scores, key=lambda p: (scores[p], p)):
+        rec = memory_store.read_record(position)
+        if rec is not None:
+            results.append(rec)
+    return results
 
 
 def search_memory(query: str, top_k: int = 5) -> str:
-    entries = _read_memory()
-    if not entries:
+    last = memory_store.last_record()
+    if last is None:
         return json.dumps({"results": []})
 
     normalized = query.strip().lower()
     if "previous question" in normalized or "last question" in normalized:
-        last = entries[-1]
         return json.dumps({"results": [last]})
     if "last fix" in normalized or "previous fix" in normalized or "what fix" in normalized:
         # naive: return last assistant message
-        last = entries[-1]
         return json.dumps({"results": [last]})
 
-    scored = []
-    for rec in entries:
-        text = f"{rec.get('user','')}\n{rec.get('assistant','')}"
-        scored.append(( _score(query, text), rec ))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = [r for s, r in scored[: max(1, top_k)] if s > 0.0]
+    semantic = memory_vectors.available() and MEMORY_SEMANTIC_WEIGHT > 0
+    with tracing.span("memory.search", top_k=top_k, semantic=semantic) as span:
+        top = _fused_search(query, top_k) if semantic else memory_index.search(query, top_k)
+        span.tag(results=len(top))
     return json.dumps({"results": top}, ensure_ascii=False)
 
 
 schema_search_memory = types.FunctionDeclaration(
     name="search_memory",
-    description="Search conversation memory in memory.json and return the most relevant Q&A pairs.",
+    description="Search conversation memory and return the most relevant Q&A pairs.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -1,10 +1,25 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal
+
+ToolName = Literal["get_files_info", "read", "write", "edit", "run_python", "run_tests", "delete", "search_memory", "search_code", "batch"]
 
 class ToolCall(BaseModel):
     """Represents a tool call the agent would make"""
-    tool: str = Field(
-        description="Exact function name: get_files_info, read, write, run_python, delete, or search_memory"
+    id: str = Field(default="", description="Short unique id of this call, e.g. s1, referenced by depends_on")
+    tool: ToolName = Field(
+        description="Exact function name: get_files_info, read, write, edit, run_python, run_tests, delete, search_memory, search_code, or batch"
+    )
+    arguments: str = Field(
+        default="{}",
+        description='The tool\'s arguments as a JSON object string, e.g. {"file_path": "main.py"}',
+    )
+    depends_on: List[str] = Field(
+        default_factory=list,
+        description="Ids of calls that must succeed before this one runs; calls without dependencies run in parallel",
+    )
+    interpret: bool = Field(
+        default=False,
+        description="True if the answer depends on reading this call's result (e.g. a read, a search or a script's output)",
     )
 
 class Step(BaseModel):
@@ -0,0 +1,229 @@
+"""Warm interpreter pool for run_python.
+
+Each worker is a long-lived fork server: a python3 process that has already
+imported WARM_PRELOAD_MODULES. For every run it forks a fresh child that
+runs the script with runpy, so scripts never share interpreter state, while
+still skipping interpreter startup and the preloaded imports. The agent
+creates the stdout/stderr pipes itself and hands their write ends to the
+server over a Unix socket, so output never passes through the server and is
+captured exactly like the cold path's.
+
+Run as `python3 -m functions.warm_python`, this module is the server side.
+"""
+import atexit
+import json
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from config import WARM_POOL_SIZE, WARM_MAX_RUNS, WARM_PRELOAD_MODULES
+from functions import output_capture
+
+_MAX_MSG = 65536
+
+
+def available():
+    return hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+
+# ---- server side (runs inside the worker process) ----
+
+def _child(request, out_fd, err_fd):
+    import runpy
+    import traceback
+
+    # the server's own modules must not shadow the script's imports
+    for name in [m for m in sys.modules if m == "config" or m.split(".")[0] == "functions"]:
+        del sys.modules[name]
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    code = 0
+    try:
+        os.chdir(request["cwd"])
+        script = request["file"]
+        sys.argv = [script] + list(request["args"])
+        # like `python3 script.py`: the script's directory comes first on sys.path
+        sys.path[0] = os.path.dirname(os.path.abspath(script))
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # drop the runpy/server frames so the traceback looks like `python3 script.py`
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != request["file"]:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _wait(pid, timeout):
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status), False
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None, True
+        time.sleep(delay)
+        delay = min(delay * 2, 0.02)
+
+
+def _serve(sock_fd, preload):
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:
+            pass  # a missing preload only costs the script its own import
+    sock = socket.socket(fileno=sock_fd)
+    while True:
+        try:
+            msg, fds, _, _ = socket.recv_fds(sock, _MAX_MSG, 2)
+        except OSError:
+            return
+        if not msg:
+            return
+        request = json.loads(msg)
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            _child(request, fds[0], fds[1])
+        for fd in fds:
+            os.close(fd)
+        sock.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+        returncode, timed_out = _wait(pid, request["timeout"])
+        sock.sendall(json.dumps({"returncode": returncode, "timeout": timed_out}).encode() + b"\n")
+
+
+# ---- agent side ----
+
+class _Worker:
+    def __init__(self):
+        parent, child = socket.socketpair()
+        self.sock = parent
+        self.proc = subprocess.Popen(
+            ["python3", "-m", "functions.warm_python", str(child.fileno()), json.dumps(WARM_PRELOAD_MODULES)],
+            pass_fds=[child.fileno()],
+            stdin=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        child.close()
+        self.replies = self.sock.makefile("rb")
+        self.runs = 0
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def run(self, cwd, file_path, args, timeout, echo):
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            request = {"cwd": cwd, "file": file_path, "args": args, "timeout": timeout}
+            socket.send_fds(self.sock, [json.dumps(request).encode()], [out_w, err_w])
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+        self.runs += 1
+        stdout_file, stderr_file = os.fdopen(out_r, "rb"), os.fdopen(err_r, "rb")
+        started = json.loads(self.replies.readline() or b"null")
+        if not started:
+            stdout_file.close()
+            stderr_file.close()
+            raise RuntimeError("warm worker exited unexpectedly")
+
+        def kill():
+            try:
+                os.kill(started["pid"], signal.SIGKILL)
+            except OSError:
+                pass
+
+        stdout, stderr, limit_hit = output_capture.capture(stdout_file, stderr_file, kill, echo)
+        finished = json.loads(self.replies.readline() or b"null")
+        if not finished:
+            raise RuntimeError("warm worker exited unexpectedly")
+        return finished["returncode"], finished["timeout"], stdout, stderr, limit_hit
+
+    def close(self):
+        try:
+            self.sock.close()
+            self.proc.wait(timeout=1)
+        except Exception:
+            self.proc.kill()
+
+
+_pool = queue.Queue()
+_pool_lock = threading.Lock()
+_workers = []
+
+
+def _acquire():
+    with _pool_lock:
+        if _pool.empty() and len(_workers) < WARM_POOL_SIZE:
+            worker = _Worker()
+            _workers.append(worker)
+            return worker
+    return _pool.get()
+
+
+def _release(worker, healthy):
+    if not healthy or worker.runs >= WARM_MAX_RUNS or not worker.alive():
+        # recycle: anything the server accumulated goes away with it
+        worker.close()
+        with _pool_lock:
+            _workers.remove(worker)
+            replacement = _Worker()
+            _workers.append(replacement)
+        worker = replacement
+    _pool.put(worker)
+
+
+def run(final_args, cwd, timeout, echo=False):
+    """Warm counterpart of run_python's _run_cold, with the same return value.
+
+    final_args is ['python3', file_path, *args]; raises TimeoutExpired like
+    subprocess.run does.
+    """
+    worker = _acquire()
+    healthy = False
+    try:
+        returncode, timed_out, stdout, stderr, limit_hit = worker.run(
+            cwd, final_args[1], final_args[2:], timeout, echo
+        )
+        healthy = True
+    finally:
+        _release(worker, healthy)
+    if timed_out:
+        raise subprocess.TimeoutExpired(final_args, timeout)
+    return returncode, stdout, stderr, limit_hit
+
+
+@atexit.register
+def shutdown():
+    with _pool_lock:
+        for worker in _workers:
+            worker.close()
+        _workers.clear()
+
+
+if __name__ == "__main__":
+    _serve(int(sys.argv[1]), json.loads(sys.argv[2]))
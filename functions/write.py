@@ -1,6 +1,7 @@
 import os
 from config import MAX_WRITE_CHARS
 from google.genai import types
+import tracing
 
 
 def write(working_directory: str, file_path: str, content: str):
@@ -17,8 +18,11 @@ def write(working_directory: str, file_path: str, content: str):
     try:
         if len(content) > MAX_WRITE_CHARS:
             return f"Error: content exceeds MAX_WRITE_CHARS ({MAX_WRITE_CHARS})."
-        with open(abs_file_path, 'w') as file:
-            file.write(content)
+        size = len(content.encode("utf-8"))
+        with tracing.span("io.write", file=file_path, bytes=size):
+            with open(abs_file_path, 'w') as file:
+                file.write(content)
+        tracing.count("bytes", size, "written")
         return f'File "{file_path}" ({len(content)}) written successfully'
     except Exception as e:
         return f"Could not write to file:{abs_file_path}, error:{e}"
@@ -0,0 +1,19 @@
+"""Small helpers shared by batch mode and server mode."""
+
+
+def flag_value(argv, flag):
+    """The argument after flag in argv, or None if flag is absent."""
+    if flag not in argv:
+        return None
+    i = argv.index(flag)
+    if i + 1 >= len(argv) or argv[i + 1].startswith("-"):
+        raise ValueError(f"{flag} needs a value")
+    return argv[i + 1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values (None if there are none)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))]
@@ -1,56 +1,26 @@
 import os
-from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 import sys
 import json
 import signal
-import instructor
-from functions.get_files_info import schema_get_files_info
-from functions.read import schema_read
-from functions.write import schema_write
-from functions.run_python import schema_run_python
-from functions.delete import schema_delete
-from functions.structured import Plan
-from functions.search_memory import schema_search_memory, save_qa
-from call_function import call_function
+import asyncio
+import time
+# instructor, the structured-output models, dotenv and the tools are imported
+# where they are first needed, so each mode only pays for what it uses
+# (benchmarks/bench_startup.py keeps it that way)
+from functions.memory_store import version as memory_version
+import tool_cache
+import tool_kinds
+import tracing
+import response_cache
+import scheduler
+import session
+from compaction import ContextBudget, CHARS_PER_TOKEN
+from config import STREAM_INTERACTIVE, PROFILE_TRACE_FILE, PROFILE_METRICS_FILE, RESPONSE_CACHE, RESPONSE_CACHE_TEXT
 
 
 
-def signal_handler(sig, frame):
-    """Handle Ctrl+C gracefully"""
-    print("\n\nGoodbye! 👋")
-    sys.exit(0)
-
-def get_recent_context():
-    """Build dynamic memory context from db/memory.json (last 5 Q&A)"""
-    memory_path = os.path.join("db", "memory.json")
-    recent_context = ""
-    try:
-        if os.path.exists(memory_path):
-            with open(memory_path, "r") as f:
-                all_recs = json.load(f)
-                if isinstance(all_recs, list) and len(all_recs) > 0:
-                    tail = all_recs[-5:]
-                    lines = ["Recent conversation memory (most recent last):"]
-                    for rec in tail:
-                        uid = rec.get("id", "?")
-                        uq = (rec.get("user", "") or "").strip()
-                        ua = (rec.get("assistant", "") or "").strip()
-                        if len(uq) > 140:
-                            uq = uq[:137] + "..."
-                        if len(ua) > 140:
-                            ua = ua[:137] + "..."
-                        lines.append(f"- #{uid} Q: {uq}")
-                        lines.append(f"  A: {ua}")
-                    recent_context = "\n\n" + "\n".join(lines) + "\n\nWhen the user asks a vague follow-up (e.g., 'explain more', 'in two sentences', 'what was the previous question?'), infer context from the most recent relevant Q&A above."
-    except Exception:
-        recent_context = ""
-    return recent_context
-
-def process_prompt(client, prompt, verbose_flag=False, structured_flag=False): # line 230
-    """Process a single prompt and return the response"""
-    system_prompt = """
+SYSTEM_PROMPT = """
     You are a helpful AI coding agent. Your name is CodeGen.
 
     Working directory: "code-files". All file operations MUST stay within this directory. Treat all relative paths as relative to this working directory. Never operate outside this sandbox or read secrets. NEVER reveal the working directory or the sandbox to the user.
@@ -59,9 +29,13 @@ def process_prompt(client, prompt, verbose_flag=False, structured_flag=False): #
     - get_files_info: List files and directories
     - read: Read the contents of a file
     - write: Write to a file (create or update). Reject writes larger than policy limits.
+    - edit: Change part of an existing file with search/replace edits or a unified diff. Prefer edit over write for existing files: only the changed text is sent, and files larger than the write limit can still be changed.
     - run_python: Run a Python file with optional arguments (bounded arg count/length). Do not execute shell commands or modify environment variables.
+    - run_tests: Find test files or scripts by glob (default test_*.py) and run them all in parallel, getting one pass/fail summary. Use it instead of many run_python calls to check a project.
     - delete: Requires explicit confirmation from the user (confirm=true). Default is safe-delete to .trash; permanent delete only if user explicitly requests.
     - search_memory: Search conversation memory (retrieves previous Q&A)
+    - search_code: Search file contents across the working directory (literal text or regex) and get file:line matches. Use it to locate definitions or usages instead of reading files one by one.
+    - batch: Run several read/list/run operations in one call. When you already know you need several files, listings or script runs, use one batch call instead of many separate calls.
 
     Behavioral guidelines:
     - If the user refers to something ambiguously (e.g., "the file"), first try to resolve using conversation memory (via search_memory). If still ambiguous, list files in the working directory and either:
@@ -71,10 +45,194 @@ def process_prompt(client, prompt, verbose_flag=False, structured_flag=False): #
     - For deletions: FIRST check if the file exists by listing files in the directory. If the file does not exist, inform the user immediately. If the file exists, THEN ask the user to choose deletion type with this exact phrasing: "Do you wish to safe delete or permanently delete [file_path]? Safe delete moves your file to a trash folder from where you can recover your file if needed. Reply with 'safe' for safe delete, 'permanent' for permanent delete, or 'cancel' to abort." If the target is ambiguous, list candidates and ask the user to choose first.
 
     Output modes:
-    - If structured output is requested, return JSON with: goal, steps[{action, reason}], tool_calls[{tool}]. ALWAYS include tool_calls array even if empty or asking for clarification. Use exact function names: get_files_info, read, write, run_python, delete, search_memory. Structured JSON mode does not use tools; provide a plan only.
+    - If structured output is requested, return JSON with: goal, steps[{action, reason}], tool_calls[{id, tool, arguments, depends_on, interpret}]. ALWAYS include tool_calls array even if empty or asking for clarification. Use exact function names: get_files_info, read, write, edit, run_python, run_tests, delete, search_memory, search_code, batch. arguments is a JSON object string with the tool's exact parameters (e.g. {"file_path": "main.py"}); depends_on lists the ids of calls that must succeed first; set interpret=true when the answer depends on reading that call's result. Structured JSON mode does not use tools itself; the plan may be executed exactly as written, so give complete arguments.
     """
 
-    recent_context = get_recent_context()
+def signal_handler(sig, frame):
+    """Handle Ctrl+C gracefully"""
+    print("\n\nGoodbye! 👋")
+    sys.exit(0)
+
+# memory directory -> (memory log version, context string); rebuilt only when the log changes
+_recent_context_cache = {}
+
+def get_recent_context(prompt="", verbose_flag=False):
+    """Build dynamic memory context from the memory log: the entries most
+    relevant to the prompt and the most recent ones, within MEMORY_CONTEXT_TOKENS"""
+    recent_context = ""
+    try:
+        key = (memory_version(), prompt)
+        cached = _recent_context_cache.get(session.memory_dir())
+        if cached is not None and cached[0] == key:
+            recent_context, ids = cached[1]
+        else:
+            from functions.memory_context import select
+
+            with tracing.span("memory.recent_context") as span:
+                entries, ids = select(prompt)
+                span.tag(entries=len(ids))
+            if entries:
+                lines = ["Conversation memory relevant to this request (oldest first; the last entry is the most recent exchange):"]
+                lines.extend(entries)
+                recent_context = "\n\n" + "\n".join(lines) + "\n\nWhen the user asks a vague follow-up (e.g., 'explain more', 'in two sentences', 'what was the previous question?'), infer context from the most recent relevant Q&A above. Use search_memory only for entries not shown here."
+            _recent_context_cache[session.memory_dir()] = (key, (recent_context, ids))
+        if verbose_flag:
+            chosen = ", ".join(f"#{i}" for i in ids) or "none"
+            print(f"Memory context: {chosen} (~{len(recent_context) // CHARS_PER_TOKEN} tokens)")
+    except Exception:
+        recent_context = ""
+    return recent_context
+
+# built on first use; the schemas never change while the process runs
+_available_functions = None
+
+def get_available_functions():
+    global _available_functions
+    if _available_functions is None:
+        from functions.get_files_info import schema_get_files_info
+        from functions.read import schema_read
+        from functions.write import schema_write
+        from functions.edit import schema_edit
+        from functions.run_python import schema_run_python
+        from functions.run_tests import schema_run_tests
+        from functions.delete import schema_delete
+        from functions.search_memory import schema_search_memory
+        from functions.search_code import schema_search_code
+        from functions.batch import schema_batch
+        _available_functions = types.Tool(
+            function_declarations=[
+                schema_get_files_info,
+                schema_read,
+                schema_write,
+                schema_edit,
+                schema_run_python,
+                schema_run_tests,
+                schema_delete,
+                schema_search_memory,
+                schema_search_code,
+                schema_batch,
+            ])
+    return _available_functions
+
+def generate_streaming(client, messages, config, on_text):
+    """Stream one model call, passing text deltas to on_text as they arrive.
+
+    Returns the chunks merged into a single response (text parts joined,
+    function-call parts kept) plus the time to the first chunk, in seconds.
+    """
+    started = time.perf_counter()
+    first_chunk_at = None
+    parts = []
+    role = "model"
+    usage = None
+    for chunk in client.models.generate_content_stream(
+        model="gemini-2.5-flash",
+        contents=messages,
+        config=config,
+    ):
+        if first_chunk_at is None:
+            first_chunk_at = time.perf_counter() - started
+        if chunk.usage_metadata is not None:
+            usage = chunk.usage_metadata
+        if not chunk.candidates or chunk.candidates[0].content is None:
+            continue
+        content = chunk.candidates[0].content
+        role = content.role or role
+        for part in content.parts or []:
+            if part.text is not None and part.function_call is None:
+                if not part.thought:
+                    on_text(part.text)
+                prev = parts[-1] if parts else None
+                if prev is not None and prev.text is not None and prev.function_call is None and prev.thought == part.thought:
+                    parts[-1] = types.Part(text=prev.text + part.text, thought=part.thought)
+                    continue
+            parts.append(part)
+
+    response = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role=role, parts=parts))] if parts else [],
+        usage_metadata=usage,
+    )
+    return response, first_chunk_at
+
+def process_prompt(client, prompt, verbose_flag=False, structured_flag=False, on_text=None, use_cache=True, execute_flag=False): # line 230
+    """Process a single prompt and return the response
+
+    With on_text set, model text is streamed to it as it arrives (errors too),
+    so the caller only needs to print the return value when not streaming.
+    use_cache=False (--no-cache) bypasses the response cache for this prompt.
+    execute_flag (--execute) asks for a structured plan and runs its tool calls
+    directly, going back to the model only if a call fails or must be read.
+    """
+    with tool_cache.turn(), tracing.span("turn", structured=structured_flag, streamed=on_text is not None, execute=execute_flag):
+        try:
+            return _process_prompt(client, prompt, verbose_flag, structured_flag, on_text, use_cache, execute_flag)
+        finally:
+            tracing.write_metrics()
+
+def _response_cache_key(kind, prompt, recent_context):
+    return response_cache.make_key(
+        kind, prompt, SYSTEM_PROMPT, recent_context, response_cache.fingerprint(session.sandbox())
+    )
+
+def _read_only_turn(function_calls):
+    # only turns that left the sandbox as it was may have their final answer cached
+    return all(tool_kinds.read_only(call) for call in function_calls)
+
+def _print_response_cache_stats():
+    stats = response_cache.stats()
+    print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+def _print_scheduler_stats():
+    stats = scheduler.stats()
+    print(
+        f"Model calls: {stats['calls']} ok, {stats['retries']} retried, {stats['throttled']} throttled, "
+        f"{stats['wait_s']:.2f}s queued, concurrency limit {stats['limit']:.1f}"
+    )
+
+def _make_plan(client, prompt, recent_context, verbose_flag, use_cache):
+    """Ask for a structured Plan (or take it from the response cache); returns it as a dict."""
+    cache_key = None
+    if use_cache and RESPONSE_CACHE:
+        cache_key = _response_cache_key("plan", prompt, recent_context)
+        cached = response_cache.get(cache_key)
+        if verbose_flag:
+            _print_response_cache_stats()
+        if cached is not None:
+            return cached
+
+    import instructor
+    from functions.structured import Plan
+
+    # Patch the client with instructor
+    instructor_client = instructor.from_genai(client)
+    
+    # Create system message with context
+    full_prompt = f"""{SYSTEM_PROMPT}{recent_context}
+
+User request: {prompt}
+
+Please provide a structured plan showing what tools you would use and why."""
+    
+    with tracing.span("model_call", structured=True):
+        # max_retries covers invalid plans; the scheduler retries throttling and server errors
+        response = scheduler.call(
+            lambda: instructor_client.messages.create(
+                model="gemini-2.5-flash",
+                messages=[{"role": "user", "content": full_prompt}],
+                response_model=Plan,
+                max_retries=2
+            ),
+            tokens=len(full_prompt) // CHARS_PER_TOKEN,
+        )
+    
+    # Convert Pydantic model to formatted JSON
+    plan = response.model_dump()
+    if cache_key is not None:
+        response_cache.put(cache_key, "plan", plan)
+    return plan
+
+def _process_prompt(client, prompt, verbose_flag, structured_flag, on_text, use_cache, execute_flag=False):
+    recent_context = get_recent_context(prompt, verbose_flag)
     
     messages = [
         types.Content(
@@ -86,58 +244,103 @@ def process_prompt(client, prompt, verbose_flag=False, structured_flag=False): #
     ]
 
     # If structured, use Instructor for clean Pydantic-based output
-    if structured_flag:
-        # Patch the client with instructor
-        instructor_client = instructor.from_genai(client)
-        
-        # Create system message with context
-        full_prompt = f"""{system_prompt}{recent_context}
+    if structured_flag and not execute_flag:
+        return json.dumps(_make_plan(client, prompt, recent_context, verbose_flag, use_cache), indent=2)
 
-User request: {prompt}
+    # If not structured, use tools to generate a response for user
+    from call_function import call_functions
+    from functions.search_memory import save_qa
 
-Please provide a structured plan showing what tools you would use and why."""
-        
-        response = instructor_client.messages.create(
-            model="gemini-2.5-flash",
-            messages=[{"role": "user", "content": full_prompt}],
-            response_model=Plan,
-            max_retries=2
+    if execute_flag:
+        # plan-then-execute: one model call for the plan, then its tool calls run as a DAG
+        from functions.structured import Plan
+        from plan_executor import execute_plan, needs_model, format_results
+
+        plan = _make_plan(client, prompt, recent_context, verbose_flag, use_cache)
+        results = execute_plan(Plan.model_validate(plan).tool_calls, verbose_flag)
+        if verbose_flag:
+            print(format_results(results))
+        if not needs_model(results):
+            response_text = f"Done: {plan['goal']}\n" + "\n".join(
+                f"- {r['id']} {r['tool']}: {(r['result'].strip().splitlines() or [''])[0]}" for r in results
+            )
+            try:
+                save_qa(prompt, response_text)
+            except Exception:
+                pass
+            if on_text is not None:
+                on_text(response_text)
+            return response_text
+        # something failed or has to be read: hand the results to the tool loop below
+        messages[0].parts[0].text = (
+            f"{prompt}\n\nA plan for this request was already executed. Its tool calls and results:\n"
+            f"{format_results(results)}\n\nDo not repeat calls that succeeded. Fix or work around "
+            "failed and skipped calls if needed, then answer the request."
         )
-        
-        # Convert Pydantic model to formatted JSON
-        return json.dumps(response.model_dump(), indent=2)
-
-    available_functions = types.Tool(
-        function_declarations=[
-            schema_get_files_info,
-            schema_read,
-            schema_write,
-            schema_run_python,
-            schema_delete,
-            schema_search_memory,
-        ])
+        use_cache = False
 
-    # If not structured, use tools to generate a response for user
+    text_cache = use_cache and RESPONSE_CACHE_TEXT
+    if text_cache:
+        cached = response_cache.get(_response_cache_key("text", prompt, recent_context))
+        if cached is not None:
+            # not saved again: the same Q&A is already the latest memory entry
+            if verbose_flag:
+                _print_response_cache_stats()
+            if on_text is not None:
+                on_text(cached)
+            return cached
+    function_calls = []
+
+    # the system instruction is fixed for the whole turn, so build the config once
+    config = types.GenerateContentConfig(
+        tools=[get_available_functions()],
+        system_instruction=SYSTEM_PROMPT + recent_context,
+    )
+    budget = ContextBudget()
     max_iters = 20
     for i in range(0, max_iters):
-        config = types.GenerateContentConfig(
-            tools=[available_functions],
-            system_instruction=system_prompt + recent_context,
-        )
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=messages,
-            config=config,
-        )
+        saved = budget.compact(messages)
+        if verbose_flag and saved:
+            print(f"Context compaction: saved ~{saved} prompt tokens this iteration")
+        started = time.perf_counter()
+        tokens = _estimate_tokens(budget, messages, config)
+        with tracing.span("model_call", iteration=i, streamed=on_text is not None) as span:
+            if on_text is not None:
+                shown = []
+                def emit(text):
+                    shown.append(text)
+                    on_text(text)
+                # a stream can only be retried before any of its text was shown
+                response, first_chunk_at = scheduler.call(
+                    lambda: generate_streaming(client, messages, config, emit),
+                    tokens=tokens,
+                    can_retry=lambda: not shown,
+                )
+                span.tag(ttft_ms=None if first_chunk_at is None else round(first_chunk_at * 1000, 3))
+            else:
+                response = scheduler.call(
+                    lambda: client.models.generate_content(
+                        model="gemini-2.5-flash",
+                        contents=messages,
+                        config=config,
+                    ),
+                    tokens=tokens,
+                )
+            _trace_usage(span, response)
+        elapsed = time.perf_counter() - started
 
         if response is None or response.usage_metadata is None:
-            return "Error: response is malformed"
+            return _stream_error(on_text, "Error: response is malformed")
+        budget.observe(response.usage_metadata, messages)
         
         if verbose_flag:
             print("User Prompt:", prompt)
             print("Prompt tokens:", response.usage_metadata.prompt_token_count)
             print("Response tokens:", response.usage_metadata.candidates_token_count)
+            if on_text is not None:
+                ttft = "n/a" if first_chunk_at is None else f"{first_chunk_at:.2f}s"
+                print(f"Time to first token: {ttft}")
+            print(f"Model latency: {elapsed:.2f}s")
 
         if response.candidates:
             for candidate in response.candidates:
@@ -146,9 +349,10 @@ Please provide a structured plan showing what tools you would use and why."""
                 messages.append(candidate.content)
 
         if response.function_calls:
-            for function_call_part in response.function_calls:
-                result = call_function(function_call_part, verbose_flag)
-                messages.append(result)
+            # independent calls run concurrently; results keep the model's call order
+            function_calls.extend(response.function_calls)
+            with tracing.span("tools", iteration=i, calls=len(response.function_calls)):
+                messages.extend(call_functions(response.function_calls, verbose_flag))
         else: 
             # final agent text message 
             response_text = response.text
@@ -157,22 +361,172 @@ Please provide a structured plan showing what tools you would use and why."""
                 save_qa(prompt, response_text or "")
             except Exception:
                 pass
+            if text_cache and response_text and _read_only_turn(function_calls):
+                # keyed on the context after saving, which is what a repeat of this prompt will see
+                key = _response_cache_key("text", prompt, get_recent_context(prompt))
+                response_cache.put(key, "text", response_text)
+            if verbose_flag:
+                stats = tool_cache.stats()
+                print(f"Tool cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+                _print_scheduler_stats()
+                if text_cache:
+                    _print_response_cache_stats()
             return response_text
     
+    return _stream_error(on_text, "Error: Maximum iterations reached")
+
+async def process_prompt_async(client, prompt, verbose_flag=False):
+    """Async tool loop for batch runs: same steps as process_prompt, but the
+    model is called through client.aio and tools run in worker threads."""
+    with tool_cache.turn(), tracing.span("turn", batch=True):
+        try:
+            return await _process_prompt_async(client, prompt, verbose_flag)
+        finally:
+            tracing.write_metrics()
+
+async def _process_prompt_async(client, prompt, verbose_flag):
+    from call_function import call_functions
+    from functions.search_memory import save_qa
+
+    recent_context = await asyncio.to_thread(get_recent_context, prompt, verbose_flag)
+    messages = [types.Content(role='user', parts=[types.Part(text=prompt)])]
+    config = types.GenerateContentConfig(
+        tools=[get_available_functions()],
+        system_instruction=SYSTEM_PROMPT + recent_context,
+    )
+    budget = ContextBudget()
+    max_iters = 20
+    for i in range(0, max_iters):
+        saved = budget.compact(messages)
+        if verbose_flag and saved:
+            print(f"Context compaction: saved ~{saved} prompt tokens this iteration")
+        with tracing.span("model_call", iteration=i) as span:
+            response = await scheduler.acall(
+                lambda: client.aio.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=messages,
+                    config=config,
+                ),
+                tokens=_estimate_tokens(budget, messages, config),
+            )
+            _trace_usage(span, response)
+
+        if response is None or response.usage_metadata is None:
+            return "Error: response is malformed"
+        budget.observe(response.usage_metadata, messages)
+
+        if verbose_flag:
+            print("User Prompt:", prompt)
+            print("Prompt tokens:", response.usage_metadata.prompt_token_count)
+            print("Response tokens:", response.usage_metadata.candidates_token_count)
+
+        if response.candidates:
+            for candidate in response.candidates:
+                if candidate is None or candidate.content is None:
+                    continue
+                messages.append(candidate.content)
+
+        if response.function_calls:
+            with tracing.span("tools", iteration=i, calls=len(response.function_calls)):
+                messages.extend(await asyncio.to_thread(call_functions, response.function_calls, verbose_flag))
+        else:
+            response_text = response.text
+            try:
+                await asyncio.to_thread(save_qa, prompt, response_text or "")
+            except Exception:
+                pass
+            return response_text
+
     return "Error: Maximum iterations reached"
 
-def main():
-    # Set up signal handler for Ctrl+C
-    signal.signal(signal.SIGINT, signal_handler)
-    
+def _estimate_tokens(budget, messages, config):
+    """Prompt tokens to reserve with the scheduler before the model reports real counts."""
+    tokens = budget.projected_tokens(messages)
+    if not budget.reported_tokens:
+        tokens += len(config.system_instruction or "") // CHARS_PER_TOKEN
+    return tokens
+
+def _trace_usage(span, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    span.tag(prompt_tokens=usage.prompt_token_count, response_tokens=usage.candidates_token_count)
+    tracing.count("tokens", usage.prompt_token_count, "prompt")
+    tracing.count("tokens", usage.candidates_token_count, "response")
+
+def _stream_error(on_text, message):
+    if on_text is not None:
+        on_text(message)
+    return message
+
+def _print_delta(text):
+    print(text, end="", flush=True)
+
+def make_client():
+    """Build the model backend named by CODEGEN_BACKEND.
+
+    "gemini" (the default) is the real API; "fake:<script.json>" replays a
+    scripted session from fake_client.py without any network access.
+    """
+    from dotenv import load_dotenv
+
     load_dotenv()
+    backend = os.environ.get("CODEGEN_BACKEND", "gemini")
+    if backend.startswith("fake:"):
+        from fake_client import FakeClient
+        return FakeClient(backend[len("fake:"):])
+    if backend != "gemini":
+        print(f"Error: unknown CODEGEN_BACKEND {backend!r} (expected 'gemini' or 'fake:<script.json>')")
+        sys.exit(1)
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         print("Error: GEMINI_API_KEY not found in environment variables.")
         print("Please make sure you have a .env file with your API key.")
         sys.exit(1)
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+def main(client=None):
+    # Set up signal handler for Ctrl+C
+    signal.signal(signal.SIGINT, signal_handler)
     
-    client = genai.Client(api_key=api_key)
+    # --profile may appear anywhere on the command line
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+        tracing.enable()
+
+    if client is None:
+        client = make_client()
+
+    # Server mode: main.py --serve [--host H] [--port P | --socket PATH]
+    if "--serve" in sys.argv:
+        from server import serve, parse_serve_args
+        try:
+            host, port, socket_path = parse_serve_args(sys.argv[1:])
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(2)
+        # load the tools and build their schemas now rather than on the first request
+        import call_function  # noqa: F401
+        get_available_functions()
+        serve(client, process_prompt, host, port, socket_path)
+        return
+
+    # Batch mode: main.py --batch in.jsonl --out out.jsonl [--concurrency N] [-v]
+    if "--batch" in sys.argv:
+        from batch import run_batch, parse_batch_args
+        try:
+            in_path, out_path, concurrency = parse_batch_args(sys.argv[1:])
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(2)
+        verbose_flag = ("-v" in sys.argv) or ("--verbose" in sys.argv)
+        summary = asyncio.run(run_batch(
+            client, process_prompt_async, in_path, out_path, concurrency, verbose_flag
+        ))
+        print(summary)
+        return
     
     # Check for command line arguments for single-shot mode (backward compatibility)
     if len(sys.argv) >= 2:
@@ -180,8 +534,15 @@ def main():
         flags = set(sys.argv[2:])
         verbose_flag = ("-v" in flags) or ("--verbose" in flags)
         structured_flag =("-s" in flags) or ("--structured" in flags)
+        stream_flag = "--stream" in flags
+        use_cache = "--no-cache" not in flags
+        execute_flag = ("-x" in flags) or ("--execute" in flags)
         
-        response = process_prompt(client, prompt, verbose_flag, structured_flag)
+        if stream_flag and not structured_flag:
+            process_prompt(client, prompt, verbose_flag, structured_flag, on_text=_print_delta, use_cache=use_cache, execute_flag=execute_flag)
+            print()
+            return
+        response = process_prompt(client, prompt, verbose_flag, structured_flag, use_cache=use_cache, execute_flag=execute_flag)
         print(response)
         return
     
@@ -189,8 +550,15 @@ def main():
     print("🤖 CodeGen AI Coding Agent")
     print("Working directory: code-files")
     print("Type 'exit' or press Ctrl+C to quit")
-    print("Use -v or --verbose for detailed output, -s or --structured for JSON thought process of the agent")
+    print("Use -v or --verbose for detailed output, -s or --structured for JSON thought process of the agent, -x or --execute to plan and then run the plan, --no-cache to skip the response cache")
+    if tracing.enabled():
+        print(f"Profiling: spans go to {PROFILE_TRACE_FILE}, metrics to {PROFILE_METRICS_FILE}")
+    if STREAM_INTERACTIVE:
+        print("Answers stream as they are generated; add --no-stream to wait for the full answer")
+    else:
+        print("Add --stream to see answers as they are generated")
     print("-" * 50)
+    default_stream = STREAM_INTERACTIVE
     
     while True:
         try:
@@ -211,12 +579,26 @@ def main():
             prompt_parts = []
             verbose_flag = False
             structured_flag = False
+            stream_flag = default_stream
+            use_cache = True
+            execute_flag = False
             
             for part in parts:
                 if part in ["-v", "--verbose"]:
                     verbose_flag = True
                 elif part in ["-s", "--structured"]:
                     structured_flag = True
+                elif part == "--stream":
+                    stream_flag = True
+                elif part == "--no-stream":
+                    stream_flag = False
+                elif part == "--no-cache":
+                    use_cache = False
+                elif part in ["-x", "--execute"]:
+                    execute_flag = True
+                elif part == "--profile":
+                    # stays on for the rest of the session
+                    tracing.enable()
                 else:
                     prompt_parts.append(part)
             
@@ -227,11 +609,16 @@ def main():
             
             # Process the prompt
             print("\n🤖 CodeGen:", end=" ")
-            response = process_prompt(client, prompt, verbose_flag, structured_flag)
+            if stream_flag and not structured_flag:
+                process_prompt(client, prompt, verbose_flag, structured_flag, on_text=_print_delta, use_cache=use_cache, execute_flag=execute_flag)
+                print()
+                continue
+            response = process_prompt(client, prompt, verbose_flag, structured_flag, use_cache=use_cache, execute_flag=execute_flag)
             print(response)
             
         except Exception as e:
             print(f"\n❌ Error: {e}")
             print("Please try again.")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Run a structured Plan's tool calls as a dependency graph.
+
+Each ToolCall carries its arguments (a JSON object string) and the ids of
+the calls it depends_on. A call starts as soon as all its dependencies have
+succeeded, so independent calls run concurrently through call_function (up
+to MAX_TOOL_WORKERS at once). A call that conflicts with an earlier one
+(call_function.conflicts, e.g. a write and a read of the same path) also
+waits for it, whatever its outcome. A call whose dependency failed is
+skipped, not run, and so is a delete: the user has to confirm those.
+"""
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from google.genai import types
+from config import MAX_CHARS, MAX_TOOL_WORKERS
+import tracing
+
+OK, FAILED, SKIPPED = "ok", "failed", "skipped"
+# how the tools report that they did not do what was asked
+FAILURE_PREFIXES = ("Error", "Could not", "Refused", "Exception")
+# tools the model must ask the user about before calling
+CONFIRM_TOOLS = {"delete"}
+
+
+def _failed(result):
+    return result.startswith(FAILURE_PREFIXES) or "Process exited with code" in result
+
+
+def _prepare(tool_calls):
+    """Return steps as dicts: id, tool, part (a FunctionCall, or None if invalid), error,
+    deps (indexes that must succeed first) and after (indexes that must merely finish first)."""
+    from call_function import conflicts
+
+    steps = []
+    seen = set()
+    for n, call in enumerate(tool_calls, 1):
+        step_id = (call.id or "").strip()
+        if not step_id or step_id in seen:
+            step_id = f"s{n}"
+        seen.add(step_id)
+        step = {
+            "id": step_id, "tool": call.tool, "part": None, "error": None,
+            "deps": set(), "after": set(), "interpret": call.interpret,
+        }
+        try:
+            args = json.loads(call.arguments or "{}")
+        except ValueError as e:
+            args, step["error"] = None, f"arguments are not valid JSON: {e}"
+        if args is not None and not isinstance(args, dict):
+            step["error"] = "arguments must be a JSON object"
+        elif args is not None:
+            step["part"] = types.FunctionCall(name=call.tool, args=args)
+        steps.append(step)
+
+    index = {step["id"]: i for i, step in enumerate(steps)}
+    for i, (call, step) in enumerate(zip(tool_calls, steps)):
+        for dep in call.depends_on:
+            if dep not in index or index[dep] == i:
+                step["error"] = step["error"] or f"unknown dependency {dep!r}"
+            else:
+                step["deps"].add(index[dep])
+        if step["part"] is not None:
+            step["after"].update(
+                j for j in range(i) if steps[j]["part"] is not None and conflicts(steps[j]["part"], step["part"])
+            )
+    return steps
+
+
+def _result_text(content):
+    response = content.parts[0].function_response.response or {}
+    return str(response.get("result", response.get("error", "")))
+
+
+def execute_plan(tool_calls, verbose=False, max_workers=MAX_TOOL_WORKERS):
+    """Run the calls; returns one dict per call, in plan order: id, tool, status, result, interpret."""
+    from call_function import call_function
+
+    steps = _prepare(tool_calls)
+    results = [None] * len(steps)
+    for i, step in enumerate(steps):
+        if step["error"]:
+            results[i] = (FAILED, f"Error: {step['error']}")
+        elif step["tool"] in CONFIRM_TOOLS:
+            results[i] = (SKIPPED, "not run: ask the user to confirm first")
+
+    with tracing.span("plan.execute", steps=len(steps)) as span, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        while True:
+            progressed = True
+            while progressed:
+                # a skip can make later steps skippable too, so repeat until nothing changes
+                progressed = False
+                for i, step in enumerate(steps):
+                    if results[i] is not None or i in running.values():
+                        continue
+                    waits_for = step["deps"] | step["after"]
+                    blocked = next((steps[j]["id"] for j in step["deps"]
+                                    if results[j] is not None and results[j][0] != OK), None)
+                    if blocked is not None:
+                        results[i] = (SKIPPED, f"not run: dependency {blocked} did not succeed")
+                        progressed = True
+                    elif all(results[j] is not None for j in waits_for):
+                        # copy_context: the call's spans and session follow it into the worker
+                        future = pool.submit(contextvars.copy_context().run, call_function, step["part"], verbose)
+                        running[future] = i
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                try:
+                    text = _result_text(future.result())
+                except Exception as e:
+                    text = f"Error: {e}"
+                results[i] = (FAILED if _failed(text) else OK, text)
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = (SKIPPED, "not run: its dependencies form a cycle")
+        span.tag(failed=sum(1 for r in results if r[0] != OK))
+
+    return [
+        {"id": step["id"], "tool": step["tool"], "status": status, "result": text, "interpret": step["interpret"]}
+        for step, (status, text) in zip(steps, results)
+    ]
+
+
+def needs_model(results):
+    """True if a call failed or was skipped, or its result has to be read to answer."""
+    return any(r["status"] != OK or r["interpret"] for r in results)
+
+
+def format_results(results, limit=MAX_CHARS):
+    """One block per call, results cut at limit characters each."""
+    blocks = []
+    for r in results:
+        text = r["result"]
+        if len(text) > limit:
+            text = text[:limit] + "\n[...result truncated]"
+        blocks.append(f"[{r['status']}] {r['id']} {r['tool']}: {text}")
+    return "\n".join(blocks)
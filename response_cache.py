@@ -0,0 +1,120 @@
+"""Persistent cache of whole-prompt answers, one JSON file per entry, kept in
+the session's memory directory.
+
+Keys hash the prompt together with everything else the answer depends on:
+the system prompt, the recent-memory context and a fingerprint of the
+sandbox (every file's path, size and mtime). Entries expire after
+RESPONSE_CACHE_TTL_S; beyond RESPONSE_CACHE_MAX_ENTRIES the least recently
+used ones are removed (a hit touches its file's mtime).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from config import RESPONSE_CACHE_TTL_S, RESPONSE_CACHE_MAX_ENTRIES
+from functions.get_files_info import SKIP_DIRS
+import session
+import tracing
+
+# inside the session's memory directory
+CACHE_NAME = "response_cache"
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def fingerprint(working_directory):
+    """Hash of every file's relative path, size and mtime under the sandbox."""
+    h = hashlib.sha256()
+    stack = [(os.path.abspath(working_directory), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if entry.name not in SKIP_DIRS:
+                        stack.append((entry.path, prefix + entry.name + "/"))
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            h.update(f"{prefix}{entry.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+def make_key(kind, prompt, system_prompt, recent_context, sandbox_fingerprint):
+    payload = json.dumps([kind, prompt, system_prompt, recent_context, sandbox_fingerprint])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(session.memory_path(CACHE_NAME), key + ".json")
+
+
+def get(key):
+    """Return the cached value for key, or None on a miss or an expired entry."""
+    global _hits, _misses
+    path = _path(key)
+    value = None
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)
+        if time.time() - entry["created"] <= RESPONSE_CACHE_TTL_S:
+            value = entry["value"]
+            os.utime(path)  # most recently used
+        else:
+            os.remove(path)
+    except (OSError, ValueError, KeyError, TypeError):
+        value = None
+    with _lock:
+        if value is None:
+            _misses += 1
+        else:
+            _hits += 1
+    tracing.count("response_cache", 1, "miss" if value is None else "hit")
+    return value
+
+
+def put(key, kind, value):
+    if RESPONSE_CACHE_MAX_ENTRIES <= 0:
+        return
+    os.makedirs(session.memory_path(CACHE_NAME), exist_ok=True)
+    tmp = _path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"created": time.time(), "kind": kind, "value": value}, f, ensure_ascii=False)
+    os.replace(tmp, _path(key))
+    _evict()
+
+
+def _evict():
+    now = time.time()
+    entries = []
+    with os.scandir(session.memory_path(CACHE_NAME)) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue
+    entries.sort()
+    excess = len(entries) - RESPONSE_CACHE_MAX_ENTRIES
+    for n, (mtime, path) in enumerate(entries):
+        # mtime is the last use, so anything unused for a whole TTL has expired too
+        if n < excess or now - mtime > RESPONSE_CACHE_TTL_S:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def stats():
+    with _lock:
+        total = _hits + _misses
+        return {"hits": _hits, "misses": _misses, "hit_rate": (_hits / total) if total else 0.0}
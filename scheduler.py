@@ -0,0 +1,252 @@
+"""One scheduler for every model call in the process.
+
+- Token buckets keep calls under MODEL_RPM requests and MODEL_TPM tokens per
+  minute. A call reserves an estimate of its tokens up front; the difference
+  from the total reported in usage_metadata is settled when it returns, so a
+  bucket can go into debt and delay the calls after it.
+- 429 and 5xx errors are retried up to MODEL_MAX_RETRIES times with full-jitter
+  exponential backoff (never sooner than a Retry-After the server sent).
+- An AIMD limit caps concurrent calls: it grows by 1/limit on each success and
+  halves on each 429, between 1 and MODEL_MAX_CONCURRENCY.
+
+Batch prompts, the tool loop and the structured path all share the same
+limits, so parallel agents in one process cannot overrun the quota together.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from config import (
+    MODEL_RPM, MODEL_TPM, MODEL_MAX_CONCURRENCY, MODEL_MAX_RETRIES, MODEL_BACKOFF_BASE_S, MODEL_BACKOFF_MAX_S,
+)
+import tracing
+
+# how often an async caller rechecks for a free concurrency slot
+SLOT_POLL_S = 0.02
+
+
+def error_status(exc):
+    """HTTP status of an API error, looking through wrapped exceptions (e.g. instructor's)."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        for attr in ("code", "status_code"):
+            value = getattr(exc, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def retryable(status):
+    return status == 429 or (status is not None and 500 <= status < 600)
+
+
+def _retry_after(exc):
+    """Seconds the server asked us to wait, from a Retry-After header or a Gemini RetryInfo."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    try:
+        if headers is not None and headers.get("retry-after"):
+            return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+    for detail in ((getattr(exc, "details", None) or {}).get("error") or {}).get("details") or []:
+        delay = isinstance(detail, dict) and detail.get("retryDelay")
+        if isinstance(delay, str):
+            m = re.match(r"^([\d.]+)s$", delay)
+            if m:
+                return float(m.group(1))
+    return 0.0
+
+
+def reported_tokens(result):
+    """Total tokens in a response's usage_metadata (instructor keeps it on _raw_response)."""
+    if isinstance(result, tuple) and result:
+        result = result[0]  # generate_streaming returns (response, time to first chunk)
+    usage = getattr(result, "usage_metadata", None)
+    if usage is None:
+        usage = getattr(getattr(result, "_raw_response", None), "usage_metadata", None)
+    if usage is None:
+        return None
+    total = getattr(usage, "total_token_count", None)
+    if total:
+        return total
+    return (getattr(usage, "prompt_token_count", None) or 0) + (getattr(usage, "candidates_token_count", None) or 0)
+
+
+class _Bucket:
+    """Refills at per_minute / 60 per second up to per_minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # a request bigger than the whole bucket only waits for a full one
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class Scheduler:
+    def __init__(self, rpm=MODEL_RPM, tpm=MODEL_TPM, max_concurrency=MODEL_MAX_CONCURRENCY,
+                 max_retries=MODEL_MAX_RETRIES, backoff_base_s=MODEL_BACKOFF_BASE_S, backoff_max_s=MODEL_BACKOFF_MAX_S):
+        self._cond = threading.Condition()
+        self._requests = _Bucket(rpm) if rpm else None
+        self._tokens = _Bucket(tpm) if tpm else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0, "wait_s": 0.0}
+
+    def _try_acquire(self, tokens):
+        """Take a slot and the bucket budget: 0.0 on success, else seconds to wait (None: until a slot frees)."""
+        if self.in_flight >= int(self.limit):
+            return None
+        now = time.monotonic()
+        wait = 0.0
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None:
+            self._tokens.level -= tokens
+        self.in_flight += 1
+        return 0.0
+
+    def _acquire(self, tokens):
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait == 0.0:
+                    break
+                self._cond.wait(timeout=wait)
+        self._waited(time.monotonic() - started)
+
+    async def _acquire_async(self, tokens):
+        started = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(tokens)
+            if wait == 0.0:
+                break
+            await asyncio.sleep(SLOT_POLL_S if wait is None else wait)
+        self._waited(time.monotonic() - started)
+
+    def _waited(self, seconds):
+        if seconds > 0.001:
+            with self._cond:
+                self._stats["wait_s"] += seconds
+            tracing.count("model_wait_ms", round(seconds * 1000), "queued")
+
+    def _release(self, reserved, used, status=None):
+        """status is None after a success, else the error's HTTP status (0 if it had none)."""
+        with self._cond:
+            self.in_flight -= 1
+            if self._tokens is not None:
+                # settle the estimate against what the call really used (nothing, if it failed)
+                self._tokens.level += reserved - (reserved if used is None else used)
+            if status is None:
+                self._stats["calls"] += 1
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif status == 429:
+                self._stats["throttled"] += 1
+                self.limit = max(1.0, self.limit / 2)
+            self._cond.notify_all()
+
+    def _backoff(self, attempt, exc):
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        return max(delay, min(_retry_after(exc), self.backoff_max_s))
+
+    def _failed(self, exc, tokens, attempt, can_retry):
+        """Release after an error; return the backoff delay, or None if the error should propagate."""
+        status = error_status(exc)
+        self._release(tokens, 0, status if status is not None else 0)
+        if not retryable(status) or attempt >= self.max_retries or (can_retry is not None and not can_retry()):
+            with self._cond:
+                self._stats["failed"] += 1
+            return None
+        with self._cond:
+            self._stats["retries"] += 1
+        tracing.count("model_retries", 1, str(status))
+        return self._backoff(attempt, exc)
+
+    def call(self, fn, tokens=0, can_retry=None):
+        """Run fn() under the limits, retrying throttled and server errors.
+
+        tokens is the estimated size of the request. can_retry, if given, is
+        asked before each retry (a stream that already showed text must not).
+        """
+        attempt = 0
+        while True:
+            self._acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._failed(e, tokens, attempt, can_retry)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._release(tokens, reported_tokens(result))
+            return result
+
+    async def acall(self, fn, tokens=0):
+        """Async call(): fn() returns an awaitable, and waits don't block the event loop."""
+        attempt = 0
+        while True:
+            await self._acquire_async(tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._failed(e, tokens, attempt, None)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._release(tokens, reported_tokens(result))
+            return result
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, "limit": self.limit, "in_flight": self.in_flight}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """The process-wide scheduler, created on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Scheduler()
+        return _shared
+
+
+def call(fn, tokens=0, can_retry=None):
+    return shared().call(fn, tokens, can_retry)
+
+
+async def acall(fn, tokens=0):
+    return await shared().acall(fn, tokens)
+
+
+def stats():
+    return shared().stats()
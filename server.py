@@ -0,0 +1,226 @@
+"""Long-running agent server: one warm model client shared by many sessions.
+
+    uv run main.py --serve [--host 127.0.0.1] [--port 8765]
+    uv run main.py --serve --socket /tmp/codegen.sock
+
+    POST /prompt  {"prompt": "...", "session": "alice", "structured": false, "execute": false, "no_cache": false}
+                  -> {"response": "...", "session": "alice", "latency_ms": ..., "queue_ms": ...}
+    GET  /stats   requests, in-flight and queued prompts, latency percentiles,
+                  model scheduler and cache counters
+    GET  /health
+
+Session "default" works in the CLI's code-files/ and db/. Any other session
+gets SERVER_SESSIONS_DIR/<name>/code-files and .../db, created on first use.
+Prompts of one session run one at a time, since they share a memory log; at
+most SERVER_MAX_CONCURRENCY prompts run at once and the rest queue.
+"""
+import json
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import SERVER_HOST, SERVER_PORT, SERVER_MAX_CONCURRENCY, SERVER_SESSIONS_DIR, SERVER_LATENCY_WINDOW
+import response_cache
+import scheduler
+import session
+import tool_cache
+import tracing
+from helpers import flag_value, percentile
+
+DEFAULT_SESSION = "default"
+SESSION_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MAX_BODY_BYTES = 1048576
+
+
+def parse_serve_args(argv):
+    """Return (host, port, socket_path) from main.py's argv."""
+    host = flag_value(argv, "--host") or SERVER_HOST
+    port = flag_value(argv, "--port")
+    try:
+        port = SERVER_PORT if port is None else int(port)
+    except ValueError:
+        raise ValueError("--port must be an integer")
+    return host, port, flag_value(argv, "--socket")
+
+
+class AgentServer:
+    """Runs prompts for concurrent sessions and keeps latency/queue statistics."""
+
+    def __init__(self, client, process_prompt, max_concurrency=SERVER_MAX_CONCURRENCY):
+        self.client = client
+        self.process_prompt = process_prompt
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._lock = threading.Lock()
+        self._session_locks = {}
+        self._started = time.time()
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._queued = 0
+        self._max_queued = 0
+        self._latencies = deque(maxlen=SERVER_LATENCY_WINDOW)  # ms, whole request
+        self._queue_waits = deque(maxlen=SERVER_LATENCY_WINDOW)  # ms before the prompt started
+
+    @staticmethod
+    def session_dirs(name):
+        """(sandbox, memory directory) of a session."""
+        if name == DEFAULT_SESSION:
+            return session.DEFAULT_SANDBOX, session.DEFAULT_MEMORY_DIR
+        root = os.path.join(SERVER_SESSIONS_DIR, name)
+        return os.path.join(root, "code-files"), os.path.join(root, "db")
+
+    def _session_lock(self, name):
+        with self._lock:
+            return self._session_locks.setdefault(name, threading.Lock())
+
+    def handle_prompt(self, payload):
+        """Run one /prompt request; returns (HTTP status, JSON body)."""
+        if not isinstance(payload, dict) or not isinstance(payload.get("prompt"), str) or not payload["prompt"].strip():
+            return 400, {"error": 'body must be a JSON object with a non-empty "prompt"'}
+        name = payload.get("session") or DEFAULT_SESSION
+        if not isinstance(name, str) or not SESSION_RE.match(name):
+            return 400, {"error": "session names are 1-64 letters, digits, '-' or '_'"}
+        sandbox, memory_dir = self.session_dirs(name)
+        os.makedirs(sandbox, exist_ok=True)
+
+        arrived = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            depth = self._queued
+            self._max_queued = max(self._max_queued, depth)
+        status, body = 200, None
+        # the session lock first, so a prompt waiting on its own session holds no slot
+        with self._session_lock(name), self._slots:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+            try:
+                with session.use(sandbox, memory_dir), tracing.span("request", session=name):
+                    response = self.process_prompt(
+                        self.client,
+                        payload["prompt"],
+                        bool(payload.get("verbose")),
+                        bool(payload.get("structured")),
+                        use_cache=not payload.get("no_cache"),
+                        execute_flag=bool(payload.get("execute")),
+                    )
+                body = {"response": response, "session": name}
+            except Exception as e:
+                status, body = 500, {"error": str(e), "session": name}
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+        finished = time.perf_counter()
+        body["latency_ms"] = round((finished - arrived) * 1000, 1)
+        body["queue_ms"] = round((started - arrived) * 1000, 1)
+        with self._lock:
+            self._requests += 1
+            self._errors += status != 200
+            self._latencies.append(body["latency_ms"])
+            self._queue_waits.append(body["queue_ms"])
+        print(
+            f"[{name}] {status} in {finished - arrived:.2f}s "
+            f"(queued {started - arrived:.2f}s, queue depth {depth - 1} on arrival)",
+            file=sys.stderr,
+        )
+        return status, body
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            waits = list(self._queue_waits)
+            stats = {
+                "uptime_s": round(time.time() - self._started, 1),
+                "requests": self._requests,
+                "errors": self._errors,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "sessions": len(self._session_locks),
+            }
+        stats["latency_ms"] = {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                               "max": max(latencies) if latencies else None}
+        stats["queue_ms"] = {"p50": percentile(waits, 50), "p95": percentile(waits, 95),
+                             "max": max(waits) if waits else None}
+        stats["model"] = scheduler.stats()
+        stats["tool_cache"] = tool_cache.stats()
+        stats["response_cache"] = response_cache.stats()
+        return stats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "CodeGen"
+    protocol_version = "HTTP/1.1"  # keep-alive, so a client reuses its connection
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"ok": True})
+        elif self.path == "/stats":
+            self._reply(200, self.server.agent.stats())
+        else:
+            self._reply(404, {"error": f"no such endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/prompt":
+            self._reply(404, {"error": f"no such endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            self._reply(413, {"error": f"body must be at most {MAX_BODY_BYTES} bytes"})
+            self.close_connection = True
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "body is not valid JSON"})
+            return
+        self._reply(*self.server.agent.handle_prompt(payload))
+
+    def _reply(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # a Unix-socket peer has no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_request(self, code="-", size="-"):
+        pass  # handle_prompt logs prompts with their latency; nothing else is worth a line
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(client, process_prompt, host=SERVER_HOST, port=SERVER_PORT, socket_path=None):
+    """Serve process_prompt until interrupted."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # left behind by a server that did not shut down cleanly
+        httpd = _UnixHTTPServer(socket_path, _Handler)
+        where = f"unix:{socket_path}"
+    else:
+        httpd = ThreadingHTTPServer((host, port), _Handler)
+        httpd.daemon_threads = True
+        where = f"http://{host}:{httpd.server_address[1]}"
+    httpd.agent = AgentServer(client, process_prompt)
+    print(f"CodeGen server listening on {where} (up to {SERVER_MAX_CONCURRENCY} prompts at once)")
+    print(f"Set CODEGEN_SERVER={where} for client.py; stats at GET /stats", flush=True)
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
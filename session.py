@@ -0,0 +1,42 @@
+"""The sandbox and memory namespace the current prompt works in.
+
+The CLI has a single session: "code-files" and "db". The server runs each
+request inside use() with that session's own directories. Both values are
+contextvars, so they follow the prompt into tool worker threads
+(copy_context) and asyncio.to_thread calls.
+"""
+import contextlib
+import contextvars
+import os
+
+DEFAULT_SANDBOX = "code-files"
+DEFAULT_MEMORY_DIR = "db"
+
+_sandbox = contextvars.ContextVar("sandbox", default=DEFAULT_SANDBOX)
+_memory_dir = contextvars.ContextVar("memory_dir", default=DEFAULT_MEMORY_DIR)
+
+
+def sandbox():
+    """Working directory of the tools (relative paths are relative to the process cwd)."""
+    return _sandbox.get()
+
+
+def memory_dir():
+    """Directory holding the memory log, its indexes and the caches."""
+    return _memory_dir.get()
+
+
+def memory_path(name):
+    return os.path.join(_memory_dir.get(), name)
+
+
+@contextlib.contextmanager
+def use(sandbox_dir, memory_dir_path):
+    """Run the block with another sandbox and memory directory."""
+    sandbox_token = _sandbox.set(sandbox_dir)
+    memory_token = _memory_dir.set(memory_dir_path)
+    try:
+        yield
+    finally:
+        _memory_dir.reset(memory_token)
+        _sandbox.reset(sandbox_token)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import session  # noqa: E402
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    """A fresh sandbox and memory directory for the test; returns the sandbox path."""
+    code = tmp_path / "code-files"
+    code.mkdir()
+    with session.use(str(code), str(tmp_path / "db")):
+        yield code
@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import main
+from batch import run_batch
+from fake_client import FakeClient
+from functions import memory_store
+
+SCRIPT = {
+    "latency_s": 0.01,
+    "turns": [{"steps": [
+        {"calls": [{"name": "get_files_info", "args": {}}]},
+        {"text": "Done."},
+    ]}],
+}
+
+
+def test_run_batch_writes_one_line_per_prompt(sandbox, tmp_path):
+    in_path = tmp_path / "prompts.jsonl"
+    lines = [json.dumps({"id": f"p{i}", "prompt": f"list files {i}"}) for i in range(8)]
+    lines += ["not json", json.dumps([1, 2]), json.dumps({"id": "empty", "prompt": ""})]
+    in_path.write_text("\n".join(lines) + "\n")
+    out_path = tmp_path / "results.jsonl"
+
+    summary = asyncio.run(run_batch(FakeClient(SCRIPT), main.process_prompt_async, str(in_path), str(out_path), concurrency=4))
+
+    records = [json.loads(line) for line in out_path.read_text().splitlines()]
+    assert len(records) == 11
+    answered = {r["id"]: r for r in records if "response" in r}
+    assert set(answered) == {f"p{i}" for i in range(8)}
+    assert all(r["response"] == "Done." for r in answered.values())
+    failed = [r for r in records if "error" in r]
+    assert len(failed) == 3 and all(r["error"] == "invalid input line" for r in failed)
+    assert "11 prompts (3 failed)" in summary
+
+    # concurrent prompts append to one memory log without reusing ids
+    saved = list(memory_store.iter_records())
+    assert len(saved) == 8
+    assert len({r["id"] for r in saved}) == 8
+    assert {r["user"] for r in saved} == {f"list files {i}" for i in range(8)}
@@ -0,0 +1,36 @@
+from functions.edit import edit
+
+
+def test_search_replace(sandbox):
+    (sandbox / "a.py").write_text("x = 1\ny = 2\n")
+    assert not edit(str(sandbox), "a.py", edits=[{"search": "y = 2", "replace": "y = 3"}]).startswith("Error")
+    assert (sandbox / "a.py").read_text() == "x = 1\ny = 3\n"
+
+
+def test_diff_removes_line_starting_with_two_dashes(sandbox):
+    (sandbox / "q.sql").write_text("a\n-- old comment\nb\n")
+    result = edit(str(sandbox), "q.sql", diff="@@ -1,3 +1,2 @@\n a\n--- old comment\n b\n")
+    assert not result.startswith("Error"), result
+    assert (sandbox / "q.sql").read_text() == "a\nb\n"
+
+
+def test_diff_adds_line_starting_with_two_pluses(sandbox):
+    (sandbox / "a.c").write_text("a\nb\n")
+    result = edit(str(sandbox), "a.c", diff="@@ -1,2 +1,3 @@\n a\n+++ counter\n b\n")
+    assert not result.startswith("Error"), result
+    assert (sandbox / "a.c").read_text() == "a\n++ counter\nb\n"
+
+
+def test_diff_file_headers_are_skipped(sandbox):
+    (sandbox / "a.py").write_text("a\nb\nc\n")
+    diff = "--- a/a.py\n+++ b/a.py\n@@ -1,2 +1,2 @@\n a\n-b\n+B\n--- a/a.py\n+++ b/a.py\n@@ -3 +3 @@\n-c\n+C\n"
+    result = edit(str(sandbox), "a.py", diff=diff)
+    assert not result.startswith("Error"), result
+    assert (sandbox / "a.py").read_text() == "a\nB\nC\n"
+
+
+def test_diff_context_mismatch_is_a_conflict(sandbox):
+    (sandbox / "a.py").write_text("a\nb\n")
+    result = edit(str(sandbox), "a.py", diff="@@ -1,2 +1,2 @@\n x\n-b\n+c\n")
+    assert "does not match" in result
+    assert (sandbox / "a.py").read_text() == "a\nb\n"
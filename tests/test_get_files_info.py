@@ -0,0 +1,24 @@
+import os
+
+from functions.get_files_info import get_files_info
+
+
+def test_negative_cursor_is_rejected(sandbox):
+    (sandbox / "a.py").write_text("")
+    assert get_files_info(str(sandbox), cursor=-1) == 'Error: "cursor" must not be negative'
+
+
+def test_recursion_does_not_follow_symlinked_directories(sandbox, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("s")
+    (sandbox / "sub").mkdir()
+    (sandbox / "sub" / "a.py").write_text("")
+    os.symlink(outside, sandbox / "link")
+    os.symlink(sandbox, sandbox / "sub" / "loop")
+
+    result = get_files_info(str(sandbox), recursive=True)
+    assert "-link :" in result and "-sub/loop :" in result
+    assert "secret.txt" not in result
+    assert "loop/" not in result
+    assert "-sub/a.py :" in result
@@ -0,0 +1,27 @@
+import pytest
+
+from batch import parse_batch_args
+from helpers import flag_value, percentile
+from server import parse_serve_args
+
+
+def test_flag_value():
+    argv = ["main.py", "--batch", "in.jsonl", "--out", "out.jsonl"]
+    assert flag_value(argv, "--out") == "out.jsonl"
+    assert flag_value(argv, "--port") is None
+    with pytest.raises(ValueError, match="--out needs a value"):
+        flag_value(["main.py", "--out", "--verbose"], "--out")
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([5, 1, 3], 50) == 3
+    assert percentile(range(1, 101), 95) == 95
+    assert percentile([2.5], 99) == 2.5
+
+
+def test_batch_and_serve_args():
+    assert parse_batch_args(["--batch", "a", "--out", "b", "--concurrency", "3"]) == ("a", "b", 3)
+    assert parse_serve_args(["--serve", "--port", "9000"])[1:] == (9000, None)
+    with pytest.raises(ValueError):
+        parse_serve_args(["--serve", "--port", "x"])
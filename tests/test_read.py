@@ -0,0 +1,26 @@
+from config import MAX_CHARS
+from functions.read import read
+
+
+def test_line_range_stops_at_last_whole_line(sandbox):
+    line = "x" * 39 + "\n"
+    (sandbox / "a.txt").write_text(line * 200)
+    per_page = MAX_CHARS // len(line)
+
+    result = read(str(sandbox), "a.txt", start_line=1, end_line=100)
+    header, body = result.split("\n", 1)
+    assert header == f"[lines 1-{per_page} of 200]"
+    assert body.startswith(line * per_page + "[...")
+    assert f"pass start_line={per_page + 1}" in result
+
+
+def test_line_range_that_fits_is_unchanged(sandbox):
+    (sandbox / "a.txt").write_text("one\ntwo\nthree\n")
+    assert read(str(sandbox), "a.txt", start_line=2, end_line=3) == "[lines 2-3 of 3]\ntwo\nthree\n"
+
+
+def test_single_long_line_points_at_offset(sandbox):
+    (sandbox / "a.txt").write_text("short\n" + "y" * (MAX_CHARS * 3) + "\n")
+    result = read(str(sandbox), "a.txt", start_line=2)
+    assert result.startswith(f"[line 2 of 2, first {MAX_CHARS} characters]\n" + "y" * MAX_CHARS + "[...")
+    assert f"offset={6 + MAX_CHARS}" in result
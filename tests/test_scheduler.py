@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from google.genai import errors, types
+
+from fake_client import FakeClient
+from scheduler import Scheduler
+
+
+def contents(prompt="hi"):
+    return [types.Content(role="user", parts=[types.Part(text=prompt)])]
+
+
+def make_scheduler(**kwargs):
+    # no rate buckets and near-zero backoff, so only the retry logic is exercised
+    options = dict(rpm=0, tpm=0, max_concurrency=8, max_retries=3, backoff_base_s=0.001, backoff_max_s=1.0)
+    options.update(kwargs)
+    return Scheduler(**options)
+
+
+def call(scheduler, client, prompt="hi"):
+    return scheduler.call(lambda: client.models.generate_content(model="fake", contents=contents(prompt)))
+
+
+def test_server_errors_are_retried():
+    client = FakeClient({"turns": [{"steps": [{"fail": [503, 500], "text": "ok"}]}]})
+    scheduler = make_scheduler()
+
+    assert call(scheduler, client).text == "ok"
+    stats = scheduler.stats()
+    assert (stats["calls"], stats["retries"], stats["throttled"], stats["failed"]) == (1, 2, 0, 0)
+    assert stats["in_flight"] == 0
+    assert client.script.calls == 3
+
+
+def test_429_halves_the_concurrency_limit():
+    client = FakeClient({"turns": [{"steps": [{"fail": [429, 429], "text": "ok"}]}]})
+    scheduler = make_scheduler()
+
+    call(scheduler, client)
+    stats = scheduler.stats()
+    assert stats["throttled"] == 2 and stats["retries"] == 2
+    # 8 -> 4 -> 2 on the two 429s, then +1/limit for the success
+    assert stats["limit"] == pytest.approx(2.5)
+
+
+def test_limit_never_drops_below_one():
+    client = FakeClient({"turns": [{"steps": [{"fail": [429] * 6, "text": "ok"}]}]})
+    scheduler = make_scheduler(max_concurrency=2, max_retries=6)
+
+    call(scheduler, client)
+    assert scheduler.stats()["limit"] == pytest.approx(2.0)  # 1.0 floor, then +1/1
+
+
+def test_retry_after_is_honored():
+    client = FakeClient({"retry_after_s": 0.2, "turns": [{"steps": [{"fail": [429], "text": "ok"}]}]})
+    scheduler = make_scheduler()
+
+    started = time.monotonic()
+    call(scheduler, client)
+    assert 0.2 <= time.monotonic() - started < 1.0
+
+
+def test_gives_up_after_max_retries():
+    client = FakeClient({"turns": [{"steps": [{"fail": [500] * 5, "text": "ok"}]}]})
+    scheduler = make_scheduler(max_retries=2)
+
+    with pytest.raises(errors.ServerError):
+        call(scheduler, client)
+    stats = scheduler.stats()
+    assert (stats["calls"], stats["retries"], stats["failed"], stats["in_flight"]) == (0, 2, 1, 0)
+
+
+def test_client_errors_are_not_retried():
+    client = FakeClient({"turns": [{"steps": [{"fail": [400], "text": "ok"}]}]})
+    scheduler = make_scheduler()
+
+    with pytest.raises(errors.ClientError):
+        call(scheduler, client)
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["failed"]) == (0, 1)
+    assert stats["limit"] == 8  # only a 429 lowers it
+
+
+def test_acall_rides_out_a_quota():
+    client = FakeClient({
+        "quota": {"requests": 3, "window_s": 0.2},
+        "retry_after_s": 0.05,
+        "turns": [{"steps": [{"text": "ok"}]}],
+    })
+    scheduler = make_scheduler(max_retries=20, backoff_max_s=0.3)
+
+    async def run():
+        return await asyncio.gather(*(
+            scheduler.acall(lambda p=f"prompt {i}": client.aio.models.generate_content(model="fake", contents=contents(p)))
+            for i in range(10)
+        ))
+
+    responses = asyncio.run(run())
+    assert [r.text for r in responses] == ["ok"] * 10
+    stats = scheduler.stats()
+    assert stats["calls"] == 10 and stats["failed"] == 0 and stats["in_flight"] == 0
+    assert stats["throttled"] > 0 and stats["retries"] == stats["throttled"]
+    assert stats["limit"] < 8
@@ -0,0 +1,16 @@
+import os
+
+from functions.search_code import search_code
+
+
+def test_symlinks_are_not_indexed(sandbox, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.py").write_text("TOKEN = 'outside'\n")
+    os.symlink(outside, sandbox / "linked_dir")
+    os.symlink(outside / "secret.py", sandbox / "linked.py")
+    (sandbox / "a.py").write_text("TOKEN = 'inside'\n")
+
+    result = search_code(str(sandbox), "TOKEN")
+    assert "a.py:1: TOKEN = 'inside'" in result
+    assert "outside" not in result
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from functions import memory_vectors
+from functions.search_memory import save_qa, search_memory
+
+
+@pytest.fixture
+def quicksort_memory(sandbox):
+    for i in range(10):
+        save_qa(f"How do I fix quicksort variant {i}?", f"The quicksort partition loop {i} had an off-by-one; use lo <= hi.")
+    save_qa("Write a csv parser", "Use the csv module with DictReader.")
+
+
+@pytest.fixture
+def semantic(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(memory_vectors, "MEMORY_SEMANTIC", True)
+
+
+def results(query):
+    return json.loads(search_memory(query))["results"]
+
+
+def test_unrelated_query_finds_nothing(quicksort_memory, semantic):
+    assert results("xylophone kangaroo") == []
+
+
+def test_semantic_match_without_shared_words(quicksort_memory, semantic):
+    found = results("the sorting bug")
+    assert found and "quicksort" in found[0]["user"]
+
+
+def test_lexical_match(quicksort_memory):
+    assert results("csv parser")[0]["user"] == "Write a csv parser"
@@ -0,0 +1,34 @@
+import tool_cache
+from call_function import call_function
+from google.genai import types
+
+
+def listing(**args):
+    content = call_function(types.FunctionCall(name="get_files_info", args={"recursive": True, **args}))
+    return content.parts[0].function_response.response["result"]
+
+
+def test_listing_is_not_reused_by_the_next_turn(sandbox):
+    (sandbox / "sub").mkdir()
+    (sandbox / "sub" / "a.py").write_text("x")
+    with tool_cache.turn():
+        first = listing()
+        assert listing() == first
+    # changed outside the agent: a new file in a subdirectory and a bigger file
+    (sandbox / "sub" / "b.py").write_text("")
+    (sandbox / "sub" / "a.py").write_text("x" * 100)
+    with tool_cache.turn():
+        second = listing()
+    assert "sub/b.py" in second and "file_size=100 bytes" in second
+    assert not any(key[0] == "get_files_info" for key in tool_cache._entries)
+
+
+def test_read_is_cached_across_turns(sandbox):
+    (sandbox / "a.py").write_text("x = 1\n")
+    call = types.FunctionCall(name="read", args={"file_path": "a.py"})
+    with tool_cache.turn():
+        call_function(call)
+    hits = tool_cache.stats()["hits"]
+    with tool_cache.turn():
+        call_function(call)
+    assert tool_cache.stats()["hits"] == hits + 1
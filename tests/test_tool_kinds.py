@@ -0,0 +1,30 @@
+from google.genai import types
+
+from call_function import conflicts
+from tool_kinds import call_path, read_only, runs_scripts
+
+
+def fc(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def test_batch_runs_scripts_only_with_a_run_op():
+    assert not runs_scripts(fc("batch", operations=[{"op": "read", "path": "a.py"}]))
+    assert runs_scripts(fc("batch", operations=[{"op": "run", "path": "a.py"}]))
+    assert runs_scripts(fc("run_tests"))
+    assert read_only(fc("batch", operations=[{"op": "list"}]))
+    assert not read_only(fc("edit", file_path="a.py"))
+
+
+def test_call_path(sandbox):
+    assert call_path(fc("read", file_path="sub/../a.py")) == str(sandbox / "a.py")
+    assert call_path(fc("get_files_info")) == str(sandbox)
+    assert call_path(fc("search_memory", query="x")) is None
+
+
+def test_conflicts(sandbox):
+    assert conflicts(fc("write", file_path="a.py"), fc("read", file_path="a.py"))
+    assert conflicts(fc("edit", file_path="sub/a.py"), fc("get_files_info", directory="sub"))
+    assert not conflicts(fc("write", file_path="a.py"), fc("read", file_path="b.py"))
+    assert not conflicts(fc("read", file_path="a.py"), fc("run_python", file_path="a.py"))
+    assert conflicts(fc("delete", file_path="b.py"), fc("run_python", file_path="a.py"))
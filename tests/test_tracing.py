@@ -0,0 +1,29 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", False)
+    monkeypatch.setattr(tracing, "_trace_path", tracing._trace_path)
+    monkeypatch.setattr(tracing, "_metrics_path", tracing._metrics_path)
+    tracing.enable(str(tmp_path / "trace.jsonl"), str(tmp_path / "metrics.prom"))
+    return tmp_path
+
+
+def test_concurrent_turns_write_metrics_safely(profiling):
+    def turn(i):
+        with tracing.span("turn"):
+            tracing.count("bytes", i, "read")
+        for _ in range(50):
+            tracing.write_metrics()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(turn, range(40)))  # re-raises any write failure
+
+    assert "codegen_bytes_total" in (profiling / "metrics.prom").read_text()
+    assert not [name for name in os.listdir(profiling) if name.endswith(".tmp")]
@@ -0,0 +1,115 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from config import TOOL_CACHE_SIZE
+
+# tools whose result depends only on their args and the files they look at
+CACHEABLE_TOOLS = {"read", "get_files_info"}
+# a directory's own stat does not change when a file in it grows or a
+# subdirectory changes, so listings are only reused within one turn
+TURN_SCOPED_TOOLS = {"get_files_info"}
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (abs path, result), least recently used first
+_hits = 0
+_misses = 0
+_turn = contextvars.ContextVar("tool_cache_turn", default=None)
+_turn_ids = itertools.count(1)
+
+
+def _signature(abs_path):
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def make_key(name, args, abs_path):
+    """Key on the call and the current state of the path it reads.
+
+    Returns None for calls that must not be cached, including listings
+    made outside a turn().
+    """
+    if name not in CACHEABLE_TOOLS or abs_path is None:
+        return None
+    try:
+        encoded = json.dumps(args or {}, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    if name in TURN_SCOPED_TOOLS:
+        if _turn.get() is None:
+            return None
+        return (name, encoded, abs_path, _signature(abs_path), _turn.get())
+    return (name, encoded, abs_path, _signature(abs_path))
+
+
+@contextlib.contextmanager
+def turn():
+    """Scope for one prompt; its cached listings are dropped when it ends."""
+    token = _turn.set(next(_turn_ids))
+    try:
+        yield
+    finally:
+        ended = _turn.get()
+        _turn.reset(token)
+        with _lock:
+            for key in [k for k in _entries if k[0] in TURN_SCOPED_TOOLS and k[4] == ended]:
+                del _entries[key]
+
+
+def get(key):
+    global _hits, _misses
+    if key is None:
+        return None
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _misses += 1
+            return None
+        _entries.move_to_end(key)
+        _hits += 1
+        return entry[1]
+
+
+def put(key, result):
+    if key is None or TOOL_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _entries[key] = (key[2], result)
+        _entries.move_to_end(key)
+        while len(_entries) > TOOL_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def invalidate(abs_path):
+    """Drop entries for abs_path, anything under it, and its parent listings."""
+    with _lock:
+        for key in list(_entries):
+            cached = _entries[key][0]
+            if (
+                cached == abs_path
+                or cached.startswith(abs_path + os.sep)
+                or abs_path.startswith(cached + os.sep)
+            ):
+                del _entries[key]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def stats():
+    with _lock:
+        total = _hits + _misses
+        return {
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": (_hits / total) if total else 0.0,
+            "entries": len(_entries),
+        }
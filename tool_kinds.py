@@ -0,0 +1,37 @@
+"""What each tool does to the sandbox, shared by dispatch, compaction and caching.
+
+Kept free of heavy imports so `import main` stays lazy.
+"""
+import os
+import session
+
+# tools that change the sandbox; they are serialized against anything touching the same path
+MUTATING_TOOLS = {"write", "edit", "delete"}
+# tools that run scripts, which may read or change any file
+SCRIPT_TOOLS = {"run_python", "run_tests"}
+# tools that leave the sandbox as it was (batch only when it runs no scripts)
+READ_ONLY_TOOLS = {"get_files_info", "read", "search_memory", "search_code", "batch"}
+
+
+def runs_scripts(call):
+    """Whether a function call runs any script (a batch does if it has a "run" op)."""
+    if call.name == "batch":
+        operations = (call.args or {}).get("operations")
+        return isinstance(operations, list) and any(
+            isinstance(op, dict) and op.get("op") == "run" for op in operations
+        )
+    return call.name in SCRIPT_TOOLS
+
+
+def read_only(call):
+    return call.name in READ_ONLY_TOOLS and not runs_scripts(call)
+
+
+def call_path(call):
+    """Absolute, normalized sandbox path a call works on (the sandbox itself if it
+    names none), or None for calls that touch no file."""
+    if call.name == "search_memory":
+        return None
+    args = call.args or {}
+    path = args.get("file_path") or args.get("directory") or "."
+    return os.path.normpath(os.path.join(os.path.abspath(session.sandbox()), str(path)))
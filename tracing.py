@@ -0,0 +1,165 @@
+"""Per-turn tracing and metrics, enabled with --profile.
+
+Spans cover model calls, tool dispatch, file I/O, subprocesses and memory
+access. Each finished span is appended to a JSONL trace file with its tags
+(tool name, bytes, tokens, iteration, ...) and feeds a latency histogram.
+Token and byte counters are cumulative. Both are written as a
+Prometheus-style textfile at the end of every turn. While profiling is off,
+span() hands back a shared no-op object.
+"""
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from config import PROFILE_TRACE_FILE, PROFILE_METRICS_FILE
+
+# histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = False
+_trace_path = PROFILE_TRACE_FILE
+_metrics_path = PROFILE_METRICS_FILE
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_current = contextvars.ContextVar("codegen_span", default=None)
+# tags a span copies from its parent, so e.g. a read inside iteration 3 says so
+INHERITED_TAGS = ("iteration",)
+_histograms = {}  # (span name, tool) -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (metric name, label) -> value
+
+
+class _NullSpan:
+    def tag(self, **tags):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "id", "parent", "trace", "tags", "start")
+
+    def __init__(self, name, parent, tags):
+        self.name = name
+        self.id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        # spans inherit their root's trace id, so one turn is one trace
+        self.trace = parent.trace if parent is not None else self.id
+        if parent is not None:
+            for tag in INHERITED_TAGS:
+                if tag in parent.tags:
+                    tags.setdefault(tag, parent.tags[tag])
+        self.tags = tags
+        self.start = time.time()
+
+    def tag(self, **tags):
+        self.tags.update(tags)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace_path=PROFILE_TRACE_FILE, metrics_path=PROFILE_METRICS_FILE):
+    global _enabled, _trace_path, _metrics_path
+    _trace_path, _metrics_path = trace_path, metrics_path
+    for path in (trace_path, metrics_path):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+    _enabled = True
+
+
+@contextmanager
+def span(name, **tags):
+    """Time a block; tags may be added later through the yielded span's tag()."""
+    if not _enabled:
+        yield _NULL
+        return
+    parent = _current.get()
+    current = _Span(name, parent, tags)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.tags["error"] = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _current.reset(token)
+        _record(current, duration)
+
+
+def count(metric, value, label=""):
+    """Add to a cumulative counter, e.g. count("tokens", 120, "prompt")."""
+    if not _enabled or not value:
+        return
+    with _lock:
+        _counters[(metric, label)] = _counters.get((metric, label), 0) + value
+
+
+def _record(current, duration):
+    line = json.dumps({
+        "trace": current.trace,
+        "span": current.id,
+        "parent": current.parent.id if current.parent is not None else None,
+        "name": current.name,
+        "start": current.start,
+        "duration_ms": round(duration * 1000, 3),
+        **current.tags,
+    }, default=str)
+    key = (current.name, str(current.tags.get("tool", "")))
+    with _lock:
+        with open(_trace_path, "a") as f:
+            f.write(line + "\n")
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                hist[i] += 1
+        hist[len(BUCKETS)] += 1
+        hist[len(BUCKETS) + 1] += duration
+
+
+def write_metrics():
+    """Rewrite the Prometheus textfile from the in-process histograms and counters."""
+    if not _enabled:
+        return
+    # one writer at a time, so a later snapshot never gets replaced by an earlier one
+    with _write_lock:
+        _write_metrics()
+
+
+def _write_metrics():
+    lines = [
+        "# HELP codegen_span_seconds Duration of agent spans (model calls, tools, I/O).",
+        "# TYPE codegen_span_seconds histogram",
+    ]
+    with _lock:
+        for (name, tool), hist in sorted(_histograms.items()):
+            labels = f'span="{name}",tool="{tool}"'
+            for bound, n in zip(BUCKETS, hist):
+                lines.append(f'codegen_span_seconds_bucket{{{labels},le="{bound}"}} {n}')
+            lines.append(f'codegen_span_seconds_bucket{{{labels},le="+Inf"}} {hist[len(BUCKETS)]}')
+            lines.append(f"codegen_span_seconds_sum{{{labels}}} {hist[len(BUCKETS) + 1]:.6f}")
+            lines.append(f"codegen_span_seconds_count{{{labels}}} {hist[len(BUCKETS)]}")
+        metrics = sorted({metric for metric, _ in _counters})
+        for metric in metrics:
+            lines.append(f"# TYPE codegen_{metric}_total counter")
+            for (name, label), value in sorted(_counters.items()):
+                if name == metric:
+                    lines.append(f'codegen_{metric}_total{{kind="{label}"}} {value}')
+    # unique per process too: a CLI and a server may share db/
+    tmp = _metrics_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, _metrics_path)
+
+
+atexit.register(write_metrics)